@@ -0,0 +1,253 @@
+"""Benchmarks of the search pipeline on synthetic portfolios."""
+
+from argparse import ArgumentParser, Namespace
+from json import dumps, loads
+from logging import INFO, basicConfig, getLogger
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+from openimmo import anbieter
+from openimmodb import Anhang
+
+from immosearch.filter import RealEstateSieve
+from immosearch.pager import Pager
+from immosearch.selector import TITLEPIC_SEARCH_GROUPS, RealEstateDataSelector
+from immosearch.sort import RealEstateSorter
+from immosearch.synthetic import Portfolio, create, portfolio, sqlite_database
+from immosearch.vectorized import VectorizedSieve
+
+
+__all__ = ["Result", "compare", "main", "run"]
+
+
+LOGGER = getLogger("immosearch-benchmark")
+SIZES = (10, 100, 1_000, 10_000, 50_000)
+REPEAT = 5
+TOLERANCE = 0.2
+BASELINE = Path("immosearch-benchmark.json")
+ATTACHMENTS = 6  # per real estate
+RENDERED = 1_000  # real estates per response
+FILTERS = {
+    "equality": "objektart==wohnung",
+    "range": "zimmer>=3 and kaltmiete<=900",
+    "membership": "ort∈[Berlin;Leipzig;Dresden] and wohnflaeche>60",
+    "disjunction": "(mietbar==true and kaltmiete<600) or kaufpreis<250000",
+    "glob": "plz~=10* and not haustiere==false",
+    "geo": "geo@[52.52;13.405;5]",
+}
+SORTS = {
+    "price": [("kaltmiete", False)],
+    "multi-key": [("ort", False), ("zimmer", True), ("wohnflaeche", True)],
+}
+INCLUDES = {
+    "titlepic": ("titlepic", "freitexte"),
+    "3atts": ("3atts", "freitexte"),
+    "allatts": ("allatts", "freitexte"),
+}
+
+
+class Result(NamedTuple):
+    """Timing result of a benchmark."""
+
+    name: str
+    median: float
+    best: float
+
+    def to_json(self) -> dict[str, float]:
+        """Returns a JSON-ish dict."""
+        return {"median": self.median, "best": self.best}
+
+
+def measure(name: str, function: Callable[[], object], repeat: int) -> Result:
+    """Runs the function repeatedly and returns its timing."""
+
+    timings = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+
+    return Result(name, median(timings), min(timings))
+
+
+def sieve(real_estates: Portfolio, filters: str) -> Callable[[], list]:
+    """Returns a function to sieve the real estates."""
+
+    return lambda: list(RealEstateSieve(real_estates, filters))
+
+
+def vectorized_sieve(real_estates: Portfolio, filters: str) -> Callable[[], list]:
+    """Returns a function to sieve the real estates vectorized."""
+
+    return lambda: list(VectorizedSieve(real_estates, filters))
+
+
+def sort(real_estates: Portfolio, options: list, limit: Optional[int] = None):
+    """Returns a function to sort the real estates."""
+
+    return lambda: list(RealEstateSorter(real_estates, options, limit=limit))
+
+
+def page(real_estates: Portfolio, size: int, number: int) -> Callable[[], list]:
+    """Returns a function to sieve, sort and page the real estates."""
+
+    return lambda: list(
+        Pager(
+            RealEstateSorter(
+                RealEstateSieve(real_estates, FILTERS["range"]), SORTS["price"]
+            ),
+            limit=size,
+            page=number,
+        )
+    )
+
+
+def select(real_estates: Portfolio, includes: tuple) -> Callable[[], list]:
+    """Returns a function to select the real estates' attachments."""
+
+    return lambda: list(RealEstateDataSelector(real_estates, selections=includes))
+
+
+def render(real_estates: Portfolio) -> Callable[[], bytes]:
+    """Returns a function to validate and serialize a response."""
+
+    def function():
+        result = anbieter(
+            anbieternr="benchmark", firma="Benchmark", openimmo_anid="benchmark"
+        )
+
+        for _, dom in real_estates:
+            dom.toxml()
+            result.immobilie.append(dom)
+
+        return result.toxml(encoding="utf-8")
+
+    return function
+
+
+def seed_attachments(real_estates: Portfolio):
+    """Creates attachments of the real estates in the bound database."""
+
+    groups = [group for group in TITLEPIC_SEARCH_GROUPS if group is not None]
+
+    for orm, _ in real_estates:
+        for number in range(ATTACHMENTS):
+            create(Anhang, immobilie=orm.id, gruppe=groups[number % len(groups)])
+
+
+def benchmarks(real_estates: Portfolio) -> Iterator[tuple[str, Callable]]:
+    """Yields (<name>, <function>) tuples of the benchmarks of a portfolio."""
+
+    size = len(real_estates)
+    rendered = real_estates[:RENDERED]
+
+    for name, filters in FILTERS.items():
+        yield (f"sieve/{name}", sieve(real_estates, filters))
+        yield (f"sieve/{name}/vectorized", vectorized_sieve(real_estates, filters))
+
+    for name, options in SORTS.items():
+        yield (f"sort/{name}", sort(real_estates, options))
+        yield (f"sort/{name}/top-10", sort(real_estates, options, limit=10))
+
+    for number in sorted({0, size // 40, size // 20}):
+        yield (f"page/10x{number}", page(real_estates, 10, number))
+
+    for name, includes in INCLUDES.items():
+        yield (f"select/{name}", select(rendered, includes))
+
+    yield ("render", render(rendered))
+
+
+def run(sizes: Iterable[int], repeat: int = REPEAT, seed: int = 0) -> dict:
+    """Runs the benchmarks and returns the results by size."""
+
+    results = {}
+
+    for size in sizes:
+        real_estates = portfolio(size, seed=seed)
+
+        with sqlite_database([Anhang]):
+            seed_attachments(real_estates[:RENDERED])
+
+            for name, function in benchmarks(real_estates):
+                result = measure(name, function, repeat)
+                LOGGER.info("%6i %-30s %10.6f s", size, name, result.median)
+                results.setdefault(str(size), {})[name] = result.to_json()
+
+    return results
+
+
+def compare(
+    results: dict, baseline: dict, tolerance: float = TOLERANCE
+) -> list[tuple[str, str, float]]:
+    """Returns (<size>, <name>, <ratio>) tuples of the benchmarks
+    whose median exceeds the baseline by more than the tolerance.
+    """
+
+    regressions = []
+
+    for size, timings in results.items():
+        for name, result in timings.items():
+            try:
+                reference = baseline[size][name]["median"]
+            except KeyError:
+                continue
+
+            if reference and (ratio := result["median"] / reference) > 1 + tolerance:
+                regressions.append((size, name, ratio))
+
+    return regressions
+
+
+def get_args() -> Namespace:
+    """Returns the parsed command line arguments."""
+
+    parser = ArgumentParser(description="Benchmark the immosearch pipeline.")
+    parser.add_argument(
+        "-s", "--size", type=int, nargs="+", default=SIZES, help="portfolio sizes"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=REPEAT, help="runs per benchmark"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="portfolio seed")
+    parser.add_argument(
+        "-b", "--baseline", type=Path, default=BASELINE, help="baseline file"
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=TOLERANCE,
+        help="allowed slowdown relative to the baseline",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the new baseline"
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Runs the benchmarks and compares them against the baseline."""
+
+    basicConfig(level=INFO, format="%(message)s")
+    args = get_args()
+    results = run(args.size, repeat=args.repeat, seed=args.seed)
+
+    if args.save:
+        args.baseline.write_text(dumps(results, indent=2))
+        LOGGER.info("Stored baseline in %s.", args.baseline)
+        return 0
+
+    if not args.baseline.is_file():
+        LOGGER.warning("No baseline in %s.", args.baseline)
+        return 0
+
+    regressions = compare(results, loads(args.baseline.read_text()), args.tolerance)
+
+    for size, name, ratio in regressions:
+        LOGGER.error("%6s %-30s %.2fx slower than baseline", size, name, ratio)
+
+    return 1 if regressions else 0
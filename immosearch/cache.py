@@ -0,0 +1,343 @@
+"""Pluggable cache backends."""
+
+from collections import OrderedDict
+from functools import wraps
+from hashlib import sha1
+from mmap import ACCESS_READ, mmap
+from os import fstat, getpid, replace, stat
+from pathlib import Path
+from pickle import HIGHEST_PROTOCOL, dumps, loads
+from struct import Struct, error as StructError
+from tempfile import gettempdir
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Callable, Hashable, Optional
+
+from immosearch.config import get_config
+
+
+__all__ = [
+    "CacheBackend",
+    "LRUCache",
+    "FileCache",
+    "RedisCache",
+    "cached",
+    "get_cache",
+    "register",
+    "stats",
+]
+
+
+SECTION = "cache"
+BACKENDS = {}
+EXPIRY = Struct("!d")
+MISSING = object()
+SWEEP_INTERVAL = 60  # seconds
+TMP_TTL = 60  # seconds until leftover temporary files are removed
+
+
+class CacheBackend:
+    """Base class of cache backends with hit and miss counters."""
+
+    def __init__(self):
+        """Initializes the counters."""
+        self.hits = 0
+        self.misses = 0
+        self.counter_lock = Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Checks whether the key is cached without counting."""
+        return self._get(key) is not MISSING
+
+    def _get(self, key: Hashable) -> Any:
+        """Returns the cached value or MISSING."""
+        raise NotImplementedError()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value or the default."""
+        if (value := self._get(key)) is MISSING:
+            with self.counter_lock:
+                self.misses += 1
+
+            return default
+
+        with self.counter_lock:
+            self.hits += 1
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Caches a value for an optional amount of seconds."""
+        raise NotImplementedError()
+
+    def delete(self, key: Hashable):
+        """Removes a value from the cache."""
+        raise NotImplementedError()
+
+    def clear(self):
+        """Removes all values from the cache."""
+        raise NotImplementedError()
+
+    @property
+    def ratio(self) -> Optional[float]:
+        """Returns the hit ratio."""
+        if total := self.hits + self.misses:
+            return self.hits / total
+
+        return None
+
+
+class LRUCache(CacheBackend):
+    """An in-process least recently used cache."""
+
+    def __init__(self, maxsize: int = 1024):
+        """Sets the maximum amount of cached values."""
+        super().__init__()
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+        self.lock = Lock()
+
+    def __len__(self) -> int:
+        """Returns the amount of cached values."""
+        return len(self.values)
+
+    def _get(self, key: Hashable) -> Any:
+        """Returns the cached value or MISSING."""
+        with self.lock:
+            try:
+                expires, value = self.values[key]
+            except KeyError:
+                return MISSING
+
+            if expires is not None and expires < time():
+                del self.values[key]
+                return MISSING
+
+            self.values.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Caches a value for an optional amount of seconds."""
+        with self.lock:
+            self.values[key] = (None if ttl is None else time() + ttl, value)
+            self.values.move_to_end(key)
+
+            while len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Removes a value from the cache."""
+        with self.lock:
+            self.values.pop(key, None)
+
+    def clear(self):
+        """Removes all values from the cache."""
+        with self.lock:
+            self.values.clear()
+
+
+class FileCache(CacheBackend):
+    """A cache of files in a directory, which can be shared by the
+    processes of one host, e.g. on a tmpfs like /dev/shm.
+    Values are pickled and files are read through mmap.
+
+    Expired files are removed when they are read and by a sweep
+    of the directory at most once every SWEEP_INTERVAL seconds.
+    """
+
+    def __init__(self, directory: Path, sweep_interval: float = SWEEP_INTERVAL):
+        """Sets the cache directory and the interval of sweeps."""
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sweep_interval = sweep_interval
+        self.swept = monotonic()
+
+    def _path(self, key: Hashable) -> Path:
+        """Returns the file path of the key."""
+        return self.directory / sha1(repr(key).encode()).hexdigest()
+
+    def _get(self, key: Hashable) -> Any:
+        """Returns the cached value or MISSING."""
+        path = self._path(key)
+
+        try:
+            with path.open("rb") as file, mmap(
+                file.fileno(), 0, access=ACCESS_READ
+            ) as data:
+                (expires,) = EXPIRY.unpack_from(data)
+
+                if expires and expires < time():
+                    expire(path, fstat(file.fileno()).st_ino)
+                    return MISSING
+
+                return loads(data[EXPIRY.size :])
+        except (FileNotFoundError, ValueError):  # Missing or empty file.
+            return MISSING
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Caches a value for an optional amount of seconds."""
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{getpid()}.tmp")
+        expires = 0 if ttl is None else time() + ttl
+        tmp.write_bytes(EXPIRY.pack(expires) + dumps(value, HIGHEST_PROTOCOL))
+        replace(tmp, path)
+
+        if monotonic() - self.swept >= self.sweep_interval:
+            self.sweep()
+
+    def delete(self, key: Hashable):
+        """Removes a value from the cache."""
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        """Removes all values from the cache."""
+        for path in self.directory.iterdir():
+            path.unlink(missing_ok=True)
+
+    def sweep(self) -> int:
+        """Removes expired and leftover temporary files
+        and returns the amount of removed files.
+        """
+        self.swept = monotonic()
+        now = time()
+        removed = 0
+
+        for path in self.directory.iterdir():
+            try:
+                if path.suffix == ".tmp":
+                    if path.stat().st_mtime + TMP_TTL < now:
+                        path.unlink(missing_ok=True)
+                        removed += 1
+
+                    continue
+
+                with path.open("rb") as file:
+                    (expires,) = EXPIRY.unpack(file.read(EXPIRY.size))
+                    inode = fstat(file.fileno()).st_ino
+            except (FileNotFoundError, StructError):
+                continue
+
+            if expires and expires < now:
+                removed += expire(path, inode)
+
+        return removed
+
+
+def expire(path: Path, inode: Optional[int]) -> bool:
+    """Removes an expired cache file, unless it has
+    been replaced by a fresh value in the meantime.
+    """
+
+    try:
+        if inode is not None and stat(path).st_ino != inode:
+            return False
+
+        path.unlink()
+    except FileNotFoundError:
+        return False
+
+    return True
+
+
+class RedisCache(CacheBackend):
+    """A cache on a Redis-compatible server."""
+
+    def __init__(self, client, prefix: str = "immosearch:"):
+        """Sets the Redis client and a key prefix."""
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "immosearch:"):
+        """Creates a Redis cache from a URL."""
+        from redis import Redis  # pylint: disable=C0415
+
+        return cls(Redis.from_url(url), prefix=prefix)
+
+    def _key(self, key: Hashable) -> str:
+        """Returns the Redis key."""
+        return self.prefix + sha1(repr(key).encode()).hexdigest()
+
+    def _get(self, key: Hashable) -> Any:
+        """Returns the cached value or MISSING."""
+        if (data := self.client.get(self._key(key))) is None:
+            return MISSING
+
+        return loads(data)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Caches a value for an optional amount of seconds."""
+        self.client.set(
+            self._key(key),
+            dumps(value, HIGHEST_PROTOCOL),
+            px=None if ttl is None else int(ttl * 1000),
+        )
+
+    def delete(self, key: Hashable):
+        """Removes a value from the cache."""
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        """Removes all values from the cache."""
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+def get_cache(name: str) -> CacheBackend:
+    """Returns the configured cache backend of the respective name."""
+
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        pass
+
+    config = get_config()
+    backend = config.get(SECTION, "backend", fallback="lru")
+
+    if backend == "file":
+        directory = config.get(
+            SECTION, "directory", fallback=str(Path(gettempdir()) / "immosearch")
+        )
+        cache = FileCache(Path(directory) / name)
+    elif backend == "redis":
+        cache = RedisCache.from_url(
+            config.get(SECTION, "url"), prefix=f"immosearch:{name}:"
+        )
+    else:
+        cache = LRUCache(config.getint(SECTION, "maxsize", fallback=1024))
+
+    return BACKENDS.setdefault(name, cache)
+
+
+def register(name: str, cache: CacheBackend) -> CacheBackend:
+    """Registers a cache backend under the respective name."""
+
+    BACKENDS[name] = cache
+    return cache
+
+
+def stats() -> dict[str, tuple[int, int]]:
+    """Returns (<hits>, <misses>) of the named cache backends."""
+
+    return {name: (cache.hits, cache.misses) for name, cache in BACKENDS.items()}
+
+
+def cached(cache: CacheBackend, ttl: Optional[float] = None) -> Callable:
+    """Decorates a function to cache its results by its arguments."""
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args):
+            if (value := cache.get(args, MISSING)) is not MISSING:
+                return value
+
+            value = function(*args)
+            cache.set(args, value, ttl=ttl)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
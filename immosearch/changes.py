@@ -0,0 +1,110 @@
+"""Change feed of real estates."""
+
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, NamedTuple, Optional
+
+from peewee import fn
+
+from mdb import Customer
+
+from immosearch.errors import InvalidParameterError
+from immosearch.orm import ChangeLog
+
+
+__all__ = ["Action", "Feed", "get_feed", "log_changes"]
+
+
+class Action(Enum):
+    """Change actions."""
+
+    ADDED = "added"
+    MODIFIED = "modified"
+    REMOVED = "removed"
+
+
+class Feed(NamedTuple):
+    """Changes since a token."""
+
+    changed: list[int]
+    removed: list[tuple[int, Optional[str]]]
+    token: int
+
+
+def log_changes(
+    customer: Customer,
+    changes: Iterable[tuple[int, Optional[str], Action]],
+):
+    """Logs (<immobilie>, <objektnr_extern>, <action>) changes."""
+
+    rows = [
+        {
+            "customer": customer,
+            "immobilie": immobilie,
+            "objektnr_extern": objektnr_extern,
+            "action": action.value,
+        }
+        for immobilie, objektnr_extern, action in changes
+    ]
+
+    if rows:
+        ChangeLog.insert_many(rows).execute()
+
+
+def get_since(token: Optional[str]):
+    """Returns a selector for log entries after a change token or timestamp."""
+
+    if not token:
+        return None
+
+    try:
+        return ChangeLog.id > int(token)
+    except ValueError:
+        pass
+
+    try:
+        return ChangeLog.timestamp > datetime.fromisoformat(token)
+    except ValueError:
+        raise InvalidParameterError(f"since={token}") from None
+
+
+def get_feed(customer: Customer, token: Optional[str]) -> Feed:
+    """Returns the real estates changed since the token.
+    Only the latest change of each real estate is considered.
+    """
+
+    latest = {}
+
+    if token and token.isdigit():
+        last_id = int(token)
+    else:
+        last_id = (
+            ChangeLog.select(fn.MAX(ChangeLog.id))
+            .where(ChangeLog.customer == customer)
+            .scalar()
+            or 0
+        )
+
+    query = ChangeLog.select().where(ChangeLog.customer == customer)
+
+    if (since := get_since(token)) is not None:
+        query = query.where(since)
+
+    for entry in query.order_by(ChangeLog.id).iterator():
+        latest.pop(entry.immobilie, None)  # Keep order of latest changes.
+        latest[entry.immobilie] = entry
+        last_id = max(last_id, entry.id)
+
+    return Feed(
+        [
+            immobilie
+            for immobilie, entry in latest.items()
+            if entry.action != Action.REMOVED.value
+        ],
+        [
+            (immobilie, entry.objektnr_extern)
+            for immobilie, entry in latest.items()
+            if entry.action == Action.REMOVED.value
+        ],
+        last_id,
+    )
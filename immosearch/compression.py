@@ -0,0 +1,130 @@
+"""Negotiated response compression."""
+
+from typing import Iterable, Iterator, Optional
+from zlib import compressobj
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__all__ = ["ENCODINGS", "SUFFIXES", "compress", "negotiate", "stream"]
+
+
+COMPRESSIBLE = {"application/xml", "application/json", "text/xml", "text/plain"}
+MIN_SIZE = 1024  # bytes
+LEVEL = 6
+SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+
+
+class GzipCompressor:  # pylint: disable=R0903
+    """Streaming gzip compressor."""
+
+    def __init__(self):
+        self.compressor = compressobj(LEVEL, wbits=31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a chunk."""
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Finishes the stream."""
+        return self.compressor.flush()
+
+
+class BrotliCompressor:  # pylint: disable=R0903
+    """Streaming brotli compressor."""
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a chunk."""
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        """Finishes the stream."""
+        return self.compressor.finish()
+
+
+class ZstdCompressor:  # pylint: disable=R0903
+    """Streaming zstd compressor."""
+
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a chunk."""
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Finishes the stream."""
+        return self.compressor.flush()
+
+
+# Available encodings by server-side preference.
+ENCODINGS = {
+    encoding: compressor
+    for encoding, compressor, available in (
+        ("zstd", ZstdCompressor, zstandard is not None),
+        ("br", BrotliCompressor, brotli is not None),
+        ("gzip", GzipCompressor, True),
+    )
+    if available
+}
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Returns the preferred available encoding
+    acceptable by the Accept-Encoding header.
+    """
+
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+
+    for item in accept_encoding.split(","):
+        encoding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+
+        qualities[encoding.lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = [
+        (qualities.get(encoding, wildcard), -index, encoding)
+        for index, encoding in enumerate(ENCODINGS)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compresses a stream of chunks."""
+
+    compressor = ENCODINGS[encoding]()
+
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+
+    yield compressor.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compresses the data."""
+
+    return b"".join(stream([data], encoding))
@@ -0,0 +1,16 @@
+"""Configuration file parsing."""
+
+from configparser import ConfigParser
+from functools import cache
+
+from configlib import load_config
+
+
+__all__ = ["get_config"]
+
+
+@cache
+def get_config() -> ConfigParser:
+    """Returns the configuration."""
+
+    return load_config("immosearch.conf")
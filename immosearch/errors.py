@@ -13,8 +13,11 @@ __all__ = [
     "OptionAlreadySet",
     "InvalidOptionsCount",
     "NotAnInteger",
+    "NoSuchSavedSearch",
+    "NotAuthorized",
     # 1<nn>   Filtering errors
     "InvalidFilterOption",
+    "InvalidFilterSyntax",
     "SievingError",
     "SecurityBreach",
     # 2<nn>   Sorting errors
@@ -98,6 +101,22 @@ class NotAnInteger(RenderableError):  # pylint: disable=R0901
         super().__init__(18, f"Not an integer: {not_integer}.")
 
 
+class NoSuchSavedSearch(RenderableError):  # pylint: disable=R0901
+    """Indicates that an invalid saved search has been selected."""
+
+    def __init__(self, ident: int):
+        """Initializes error code an message."""
+        super().__init__(19, f"No such saved search: {ident}.")
+
+
+class NotAuthorized(RenderableError):  # pylint: disable=R0901
+    """Indicates that a secret or key is missing or invalid."""
+
+    def __init__(self, subject: str):
+        """Initializes error code an message."""
+        super().__init__(20, f"Not authorized: {subject}.", status=403)
+
+
 class InvalidFilterOption(RenderableError):  # pylint: disable=R0901
     """Indicates that an invalid filtering
     option has been provided.
@@ -108,6 +127,14 @@ class InvalidFilterOption(RenderableError):  # pylint: disable=R0901
         super().__init__(102, f"Invalid filtering option: {option}.")
 
 
+class InvalidFilterSyntax(RenderableError):  # pylint: disable=R0901
+    """Indicates that the filter expression is malformed."""
+
+    def __init__(self, msg):
+        """Initializes with the syntax error's description."""
+        super().__init__(103, f"Invalid filter syntax: {msg}.")
+
+
 class SievingError(RenderableError):  # pylint: disable=R0901
     """Indicates an error during sieving."""
 
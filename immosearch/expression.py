@@ -0,0 +1,384 @@
+"""Boolean filter expressions with short-circuiting
+and selectivity-based clause reordering.
+"""
+
+from re import IGNORECASE, compile as compile_
+from threading import Lock
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional, Union
+
+from immosearch.cache import LRUCache, register
+from immosearch.errors import InvalidFilterSyntax
+
+
+__all__ = [
+    "And",
+    "Clause",
+    "Not",
+    "Or",
+    "Statistics",
+    "get_statistics",
+    "parse",
+]
+
+
+# Start of a clause, i.e. an option followed by an operator.
+CLAUSE = "(?:\\(|not\\s|\\w+\\s*[^\\w\\s()])"
+BOUNDARY = compile_(f"\\s+(and|or)(?:\\s+(?={CLAUSE})|(?=\\())", IGNORECASE)
+CONJUNCTION = compile_("(and|or)(?:\\s+|(?=\\())", IGNORECASE)
+NEGATION = compile_("not(?:\\s+|(?=\\())", IGNORECASE)
+KEYWORDS = {"(", ")", "and", "or", "not"}
+PRIOR = 0.5  # Assumed probability of unseen clauses to match.
+PRIOR_WEIGHT = 2  # Pseudo-evaluations of the prior.
+MAX_CLAUSES = 1024  # per statistics
+MAX_STATISTICS = 1024  # keys, e.g. customers, to keep statistics of
+EPSILON = 1e-6
+STATISTICS = register("statistics", LRUCache(maxsize=MAX_STATISTICS))
+
+
+class Statistics:
+    """Evaluation and match counts of clauses.
+
+    Recording is not thread-safe. Statistics shared by threads
+    are updated by merging the statistics of single evaluations.
+    """
+
+    def __init__(self):
+        """Initializes the counts."""
+        self.counts = {}
+        self.lock = Lock()
+
+    def add(self, key: str, evaluated: int, matched: int):
+        """Adds evaluation and match counts of a clause."""
+        try:
+            counts = self.counts[key]
+        except KeyError:
+            if len(self.counts) >= MAX_CLAUSES:
+                del self.counts[next(iter(self.counts))]
+
+            counts = self.counts[key] = [0, 0]
+
+        counts[0] += evaluated
+        counts[1] += matched
+
+    def record(self, key: str, result: bool):
+        """Records the result of an evaluation."""
+        self.add(key, 1, result)
+
+    def merge(self, other: "Statistics"):
+        """Adds the counts of other statistics."""
+        with self.lock:
+            for key, (evaluated, matched) in other.counts.items():
+                self.add(key, evaluated, matched)
+
+    def probability(self, key: str) -> float:
+        """Returns the smoothed probability of the clause to match."""
+        evaluated, matched = self.counts.get(key, (0, 0))
+        return (matched + PRIOR * PRIOR_WEIGHT) / (evaluated + PRIOR_WEIGHT)
+
+
+class Clause:
+    """A leaf of the expression, i.e. a single filter operation."""
+
+    def __init__(self, text: str, operation: Any = None, cost: float = 1.0):
+        """Sets the clause's text, its compiled operation, which
+        defaults to the text, and its relative evaluation cost.
+        """
+        self.text = text
+        self.operation = text if operation is None else operation
+        self.cost = cost
+
+    def __iter__(self):
+        """Yields the clause itself."""
+        yield self
+
+    def plan(self, _: Statistics) -> "Clause":
+        """Returns the clause itself."""
+        return self
+
+    def estimate(self, statistics: Statistics) -> tuple[float, float]:
+        """Returns the cost and the match probability."""
+        return (self.cost, statistics.probability(self.text))
+
+    def evaluate(self, callback: Callable[[Any], bool], statistics: Statistics):
+        """Evaluates the operation and records the result."""
+        result = callback(self.operation)
+        statistics.record(self.text, result)
+        return result
+
+
+class Not:
+    """Negation of an expression."""
+
+    def __init__(self, child: "Expression"):
+        """Sets the negated expression."""
+        self.child = child
+
+    def __iter__(self):
+        """Yields the clauses."""
+        yield from self.child
+
+    def plan(self, statistics: Statistics) -> "Not":
+        """Returns the negation of the planned expression."""
+        return Not(self.child.plan(statistics))
+
+    def estimate(self, statistics: Statistics) -> tuple[float, float]:
+        """Returns the cost and the match probability."""
+        cost, probability = self.child.estimate(statistics)
+        return (cost, 1 - probability)
+
+    def evaluate(self, callback: Callable[[Any], bool], statistics: Statistics):
+        """Negates the result of the expression."""
+        return not self.child.evaluate(callback, statistics)
+
+
+class And:
+    """Conjunction of expressions."""
+
+    def __init__(self, children: Iterable["Expression"]):
+        """Sets the conjoined expressions."""
+        self.children = list(children)
+
+    def __iter__(self):
+        """Yields the clauses."""
+        for child in self.children:
+            yield from child
+
+    def plan(self, statistics: Statistics) -> "And":
+        """Orders the children so that cheap clauses,
+        which are likely to fail, are evaluated first.
+        """
+        children = [child.plan(statistics) for child in self.children]
+        estimates = {id(child): child.estimate(statistics) for child in children}
+        children.sort(
+            key=lambda child: estimates[id(child)][0]
+            / max(1 - estimates[id(child)][1], EPSILON)
+        )
+        return type(self)(children)
+
+    def estimate(self, statistics: Statistics) -> tuple[float, float]:
+        """Returns the expected cost and the match probability."""
+        cost = 0.0
+        reached = 1.0
+
+        for child in self.children:
+            child_cost, probability = child.estimate(statistics)
+            cost += reached * child_cost
+            reached *= probability
+
+        return (cost, reached)
+
+    def evaluate(self, callback: Callable[[Any], bool], statistics: Statistics):
+        """Checks whether all children match."""
+        for child in self.children:
+            if not child.evaluate(callback, statistics):
+                return False
+
+        return True
+
+
+class Or(And):
+    """Disjunction of expressions."""
+
+    def plan(self, statistics: Statistics) -> "Or":
+        """Orders the children so that cheap clauses,
+        which are likely to match, are evaluated first.
+        """
+        children = [child.plan(statistics) for child in self.children]
+        estimates = {id(child): child.estimate(statistics) for child in children}
+        children.sort(
+            key=lambda child: estimates[id(child)][0]
+            / max(estimates[id(child)][1], EPSILON)
+        )
+        return type(self)(children)
+
+    def estimate(self, statistics: Statistics) -> tuple[float, float]:
+        """Returns the expected cost and the match probability."""
+        cost = 0.0
+        reached = 1.0
+
+        for child in self.children:
+            child_cost, probability = child.estimate(statistics)
+            cost += reached * child_cost
+            reached *= 1 - probability
+
+        return (cost, 1 - reached)
+
+    def evaluate(self, callback: Callable[[Any], bool], statistics: Statistics):
+        """Checks whether any child matches."""
+        for child in self.children:
+            if child.evaluate(callback, statistics):
+                return True
+
+        return False
+
+
+Expression = Union[Clause, Not, And, Or]
+
+
+class Parser:
+    """Recursive descent parser of filter expressions.
+
+    Operator precedence is not over and over or.
+    """
+
+    def __init__(self, tokens: Iterable[str], clause: Callable[[str], Clause]):
+        """Sets the tokens and the clause factory."""
+        self.tokens = list(tokens)
+        self.position = 0
+        self.clause = clause
+
+    def peek(self) -> Optional[str]:
+        """Returns the current token."""
+        try:
+            return self.tokens[self.position]
+        except IndexError:
+            return None
+
+    def pop(self) -> Optional[str]:
+        """Returns the current token and advances."""
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> Expression:
+        """Parses the entire expression."""
+        expression = self.disjunction()
+
+        if (token := self.peek()) is not None:
+            raise InvalidFilterSyntax(f'unexpected "{token}"')
+
+        return expression
+
+    def disjunction(self) -> Expression:
+        """Parses expressions joined by or."""
+        children = [self.conjunction()]
+
+        while self.peek() == "or":
+            self.pop()
+            children.append(self.conjunction())
+
+        return children[0] if len(children) == 1 else Or(children)
+
+    def conjunction(self) -> Expression:
+        """Parses expressions joined by and."""
+        children = [self.negation()]
+
+        while self.peek() == "and":
+            self.pop()
+            children.append(self.negation())
+
+        return children[0] if len(children) == 1 else And(children)
+
+    def negation(self) -> Expression:
+        """Parses negated, parenthesized and plain clauses."""
+        token = self.pop()
+
+        if token == "not":
+            return Not(self.negation())
+
+        if token == "(":
+            expression = self.disjunction()
+
+            if self.pop() != ")":
+                raise InvalidFilterSyntax("missing closing parenthesis")
+
+            return expression
+
+        if token is None:
+            raise InvalidFilterSyntax("unexpected end of filter")
+
+        if token in KEYWORDS:
+            raise InvalidFilterSyntax(f'unexpected "{token}"')
+
+        return self.clause(token)
+
+
+def skip(filters: str, position: int) -> int:
+    """Returns the position after whitespace."""
+
+    while position < len(filters) and filters[position].isspace():
+        position += 1
+
+    return position
+
+
+def clause_end(filters: str, position: int, depth: int) -> int:
+    """Returns the end of the clause starting at the position.
+
+    The clause ends before a keyword, which is followed by another
+    clause, or before a closing parenthesis of the expression at the
+    respective depth. Parentheses within the value are balanced.
+    """
+
+    nested = 0
+
+    for index in range(position, len(filters)):
+        if (char := filters[index]) == "(":
+            nested += 1
+        elif char == ")":
+            if nested:
+                nested -= 1
+            elif depth:
+                return index
+        elif not nested and char.isspace() and BOUNDARY.match(filters, index):
+            return index
+
+    return len(filters)
+
+
+def tokenize(filters: str) -> Iterator[str]:
+    """Yields the tokens of a filter string.
+
+    Parentheses and keywords are only tokens at clause boundaries,
+    so that values may contain them, e.g. "ort==Halle and Saale".
+    """
+
+    position = depth = 0
+
+    while (position := skip(filters, position)) < len(filters):
+        if filters[position] == "(":
+            yield "("
+            depth += 1
+            position += 1
+            continue
+
+        if match := NEGATION.match(filters, position):
+            yield "not"
+            position = match.end()
+            continue
+
+        end = clause_end(filters, position, depth)
+
+        if clause := filters[position:end].strip():
+            yield clause
+
+        position = skip(filters, end)
+
+        while position < len(filters) and filters[position] == ")":
+            yield ")"
+            depth -= 1
+            position = skip(filters, position + 1)
+
+        if match := CONJUNCTION.match(filters, position):
+            yield match.group(1).lower()
+            position = match.end()
+        elif position < len(filters):
+            yield filters[position:]
+            return
+
+
+def parse(filters: str, clause: Callable[[str], Clause] = Clause) -> Expression:
+    """Parses a filter string into an expression
+    whose clauses are created by the factory.
+    """
+
+    return Parser(tokenize(filters), clause).parse()
+
+
+def get_statistics(key: Hashable) -> Statistics:
+    """Returns the clause statistics of the respective key, e.g. a customer."""
+
+    if (statistics := STATISTICS.get(key)) is None:
+        STATISTICS.set(key, statistics := Statistics())
+
+    return statistics
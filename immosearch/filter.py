@@ -1,30 +1,45 @@
 """Realtor and real estate filtering."""
 
 from datetime import datetime
-from typing import Any, Callable, Iterable, Iterator, Optional
+from fnmatch import translate
+from re import IGNORECASE, Pattern, compile as compile_
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, Optional
 
-from boolparse import SecurityError, evaluate
-from openimmolib.types import Anbieter, Immobilie, Openimmo
-from openimmolib.util import active
+from peewee import CharField, TextField
 
+from immosearch.cache import LRUCache, cached, register
 from immosearch.errors import InvalidFilterOption
-from immosearch.errors import SecurityBreach
+from immosearch.errors import InvalidFilterSyntax
 from immosearch.errors import SievingError
-from immosearch.lib import Operator, cast
+from immosearch.expression import Clause, Expression, Statistics, parse
+from immosearch.geo import BoundingBox, Circle, Region, distance
+from immosearch.lib import Members, Operator, cast, lazy_import, split_list
+from immosearch.options import FILTER_OPTIONS, Option
 
+if TYPE_CHECKING:
+    from openimmolib.types import Anbieter, Immobilie, Openimmo
 
-__all__ = ["RealEstateSieve"]
+util = lazy_import("openimmolib.util")
+
+
+__all__ = ["RealEstateSieve", "filter_options", "geo_regions", "sql_condition"]
 
 
 Operation = tuple[str, Operator, Callable[[Any, Any], bool], str]
+CompiledOperation = tuple[
+    str, Operator, Callable[[Any, Any], bool], Callable[[Any], Any], Any, str
+]
+CONJUNCTION = compile_("\\s+and\\s+", IGNORECASE)
+NON_CONJUNCTIVE = compile_("[()]|\\b(or|not)\\b", IGNORECASE)
+WILDCARDS = compile_("[*?[]")
 
 
 OPERATIONS = {
     Operator.EQ: lambda x, y: x == y,
-    # Operator.EG: ,
+    Operator.EG: lambda x, y: y.fullmatch(x) is not None,
     Operator.EC: lambda x, y: x.lower() == y.lower(),
     Operator.NE: lambda x, y: x != y,
-    # Operator.NG: ,
+    Operator.NG: lambda x, y: y.fullmatch(x) is None,
     Operator.NC: lambda x, y: x.lower() != y.lower(),
     Operator.LT: lambda x, y: x < y,
     Operator.LE: lambda x, y: x <= y,
@@ -34,65 +49,17 @@ OPERATIONS = {
     Operator.NI: lambda x, y: x not in y,
     Operator.CO: lambda x, y: y in x,
     Operator.CN: lambda x, y: y not in x,
+    Operator.WC: lambda x, y: y.contains(x),
+    Operator.WB: lambda x, y: y.contains(x),
 }
+REGIONS = {Operator.WC: Circle, Operator.WB: BoundingBox}
 
-OPTIONS = {
-    "objektart": lambda fre: fre.objektart,
-    "objekttyp": lambda fre: fre.objekttypen,
-    "land": lambda fre: fre.land,
-    "ort": lambda fre: fre.ort,
-    "ortsteil": lambda fre: fre.ortsteil,
-    "plz": lambda fre: fre.plz,
-    "strasse": lambda fre: fre.strasse,
-    "hausnummer": lambda fre: fre.hausnummer,
-    "zimmer": lambda fre: fre.zimmer,
-    "etage": lambda fre: fre.etage,
-    "etagen": lambda fre: fre.etagen,
-    "wohnflaeche": lambda fre: fre.wohnflaeche,
-    "grundstuecksflaeche": lambda fre: fre.grundstuecksflaeche,
-    "balkone": lambda fre: fre.balkone,
-    "terrassen": lambda fre: fre.terrassen,
-    "kaltmiete": lambda fre: fre.kaltmiete or fre.nettokaltmiete,
-    "warmmiete": lambda fre: fre.warmmiete or fre.gesamtmiete,
-    "nebenkosten": lambda fre: fre.nebenkosten,
-    "kaufpreis": lambda fre: fre.kaufpreis,
-    "pacht": lambda fre: fre.pacht,
-    "erbpacht": lambda fre: fre.erbpacht,
-    "aussen_courtage": lambda fre: fre.aussen_courtage,
-    "innen_courtage": lambda fre: fre.innen_courtage,
-    "openimmo_obid": (str, lambda fre: fre.openimmo_obid),
-    "objektnr_intern": (str, lambda fre: fre.objektnr_intern),
-    "objektnr_extern": (str, lambda fre: fre.objektnr_extern),
-    "barrierefrei": lambda fre: fre.barrierefrei,
-    "rollstuhlgerecht": lambda fre: fre.rollstuhlgerecht,
-    "haustiere": lambda fre: fre.haustiere,
-    "raucher": lambda fre: fre.raucher,
-    "kaufbar": lambda fre: fre.kaufbar,
-    "mietbar": lambda fre: fre.mietbar,
-    "erbpachtbar": lambda fre: fre.erbpachtbar,
-    "leasing": lambda fre: fre.leasing,
-    "verfuegbar_ab": lambda fre: fre.verfuegbar_ab,
-    "abdatum": lambda fre: fre.abdatum,
-    "moebliert": lambda fre: fre.moebliert,
-    "seniorengerecht": lambda fre: fre.seniorengerecht,
-    "baujahr": (str, lambda fre: fre.baujahr),
-    "zustand": lambda fre: fre.zustand,
-    "epart": lambda fre: fre.epart,
-    "energieverbrauchkennwert": lambda fre: fre.energieverbrauchkennwert,
-    "endenergiebedarf": lambda fre: fre.endenergiebedarf,
-    "primaerenergietraeger": lambda fre: fre.primaerenergietraeger,
-    "stromwert": lambda fre: fre.stromwert,
-    "waermewert": lambda fre: fre.waermewert,
-    "wertklasse": lambda fre: fre.wertklasse,
-    "min_mietdauer": lambda fre: fre.min_mietdauer,
-    "max_mietdauer": lambda fre: fre.max_mietdauer,
-    "laufzeit": lambda fre: fre.laufzeit,
-    "max_personen": lambda fre: fre.max_personen,
-    "weitergabe_generell": lambda fre: fre.weitergabe_generell,
-    "weitergabe_negativ": lambda fre: fre.weitergabe_negativ,
-    "weitergabe_positiv": lambda fre: fre.weitergabe_positiv,
-    "aktiv": lambda fre: fre.active,
-}
+# Options, which are stored as columns on the real estate model.
+COLUMNS = {"objektnr_extern": "objektnr_extern", "openimmo_obid": "openimmo_obid"}
+
+# Relative evaluation costs of operators, defaulting to 1.
+OPERATOR_COSTS = {Operator.EG: 2.0, Operator.NG: 2.0, Operator.WC: 3.0}
+REPLAN = 256  # Real estates to sieve before reordering the clauses.
 
 
 class FilterableRealEstate:
@@ -100,19 +67,22 @@ class FilterableRealEstate:
     that can be filtered by certain attributes.
     """
 
-    def __init__(self, immobilie: Immobilie):
-        """Sets the appropriate OpenImmo™-immobilie"""
+    def __init__(self, immobilie: "Immobilie", origin: Optional[tuple] = None):
+        """Sets the appropriate OpenImmo™-immobilie
+        and an optional origin for distance calculation.
+        """
         self.immobilie = immobilie
+        self.origin = origin
 
     @classmethod
-    def fromopenimmo(cls, openimmo: Openimmo):
+    def fromopenimmo(cls, openimmo: "Openimmo"):
         """Yields filterable real estates from an OpenImmo document."""
         for anbieter in openimmo.andbieter:
             for filterable_real_estate in cls.fromanbieter(anbieter):
                 yield filterable_real_estate
 
     @classmethod
-    def fromanbieter(cls, anbieter: Anbieter):
+    def fromanbieter(cls, anbieter: "Anbieter"):
         """Yields filterable real estates from a realtor."""
         for immobilie in anbieter.immobilie:
             yield cls(immobilie)
@@ -261,6 +231,27 @@ class FilterableRealEstate:
 
         return None
 
+    @property
+    def geokoordinaten(self):
+        """Returns the latitude and longitude."""
+        try:
+            geokoordinaten = self.immobilie.geo.geokoordinaten
+        except AttributeError:
+            return None
+
+        if geokoordinaten is None:
+            return None
+
+        return (float(geokoordinaten.breitengrad), float(geokoordinaten.laengengrad))
+
+    @property
+    def distanz(self):
+        """Returns the distance to the origin in km."""
+        if self.origin is None or (geokoordinaten := self.geokoordinaten) is None:
+            return None
+
+        return distance(self.origin, geokoordinaten)
+
     @property
     def zimmer(self):
         """Returns the number of rooms."""
@@ -727,13 +718,15 @@ class FilterableRealEstate:
     @property
     def active(self):
         """Determines whether the real estate is active."""
-        return active(self.immobilie)
+        return util.active(self.immobilie)
 
     def evaluate(self, operation: str) -> bool:
         """Real estate evaluation callback."""
-        option, operator, operation_func, raw_value = parse_operation(operation)
-        option_func, option_format = get_option(option)
-        value = cast(raw_value, typ=option_format)
+        return self.apply(compile_operation(operation))
+
+    def apply(self, operation: CompiledOperation) -> bool:
+        """Applies a compiled operation to the real estate."""
+        option, operator, operation_func, option_func, value, raw_value = operation
 
         try:
             return bool(operation_func(option_func(self), value))
@@ -744,36 +737,49 @@ class FilterableRealEstate:
             raise SievingError(option, operator, raw_value) from None
 
 
-Option = tuple[Callable[[FilterableRealEstate], Any], Optional[str]]
-
-
 class RealEstateSieve:
     """Class that sieves real estates by certain filters."""
 
-    def __init__(self, real_estates: Iterable[Immobilie], filters):
+    def __init__(
+        self,
+        real_estates: Iterable["Immobilie"],
+        filters,
+        filterable: type = FilterableRealEstate,
+        statistics: Optional[Statistics] = None,
+    ):
         """Sets the respective realtor and filter tuples like:
-        (<option>, <operation>, <target_value>).
+        (<option>, <operation>, <target_value>), the class
+        to wrap the real estates for evaluation and optional
+        clause statistics to order the clauses by, which may be
+        shared by threads and are updated every REPLAN real estates.
         """
         self.real_estates = real_estates
         self.filters = filters
+        self.filterable = filterable
+        self.statistics = statistics
 
-    def __iter__(self) -> Iterator[Immobilie]:
+    def __iter__(self) -> Iterator["Immobilie"]:
         """Sieve real estates by the given filters."""
-        if self.filters:
-            for orm, dom in self.real_estates:
-                filterable_real_estate = FilterableRealEstate(dom)
-                applicable = evaluate(
-                    self.filters, callback=filterable_real_estate.evaluate
-                )
+        if not self.filters:
+            yield from self.real_estates
+            return
 
-                try:
-                    if applicable:
-                        yield (orm, dom)
-                except SecurityError as sec_err:
-                    raise SecurityBreach(str(sec_err)) from None
-        else:
-            for real_estate in self.real_estates:
-                yield real_estate
+        expression = parse_filters(self.filters)
+        shared = self.statistics or Statistics()
+        plan = expression.plan(shared)
+        statistics = Statistics()
+
+        try:
+            for count, (orm, dom) in enumerate(self.real_estates, start=1):
+                if plan.evaluate(self.filterable(dom).apply, statistics):
+                    yield (orm, dom)
+
+                if count % REPLAN == 0:
+                    shared.merge(statistics)
+                    statistics = Statistics()
+                    plan = expression.plan(shared)
+        finally:
+            shared.merge(statistics)
 
 
 def parse_operation(operation: str) -> Operation:
@@ -801,17 +807,204 @@ def parse_operation(operation: str) -> Operation:
     return (option, operator, operation_func, value)
 
 
+@cached(register("filters", LRUCache(maxsize=1024)))
+def compile_operation(operation: str) -> CompiledOperation:
+    """Parses the operation and casts its value once.
+    List literals of membership tests are cast into frozen sets.
+    """
+
+    option, operator, operation_func, raw_value = parse_operation(operation)
+    setting = get_option(option)
+    option_func, option_format = setting.extract, setting.literal
+
+    if operator in {Operator.EG, Operator.NG}:
+        value = compile_glob(raw_value)
+    elif (region := REGIONS.get(operator)) is not None:
+        try:
+            value = region.fromlist(split_list(raw_value))
+        except (TypeError, ValueError):
+            raise SievingError(option, operator, raw_value) from None
+    elif operator in {Operator.IN, Operator.NI} and (
+        items := split_list(raw_value)
+    ) is not None:
+        value = Members(items, typ=option_format)
+    else:
+        value = cast(raw_value, typ=option_format)
+
+    return (option, operator, operation_func, option_func, value, raw_value)
+
+
+def compile_clause(operation: str) -> Clause:
+    """Compiles the operation into a clause of a filter expression."""
+
+    compiled = compile_operation(operation)
+    option, operator, *_ = compiled
+    cost = FILTER_OPTIONS[option].cost * OPERATOR_COSTS.get(operator, 1.0)
+    return Clause(operation, compiled, cost=cost)
+
+
+@cached(register("expressions", LRUCache(maxsize=1024)))
+def parse_filters(filters: str) -> Expression:
+    """Parses the filters into an expression of compiled clauses."""
+
+    return parse(filters, compile_clause)
+
+
+def sql_condition(
+    filters: Optional[str], model, columns: Mapping[str, str] = COLUMNS
+) -> Optional[Any]:
+    """Returns an SQL condition on the model, which pre-selects real estates
+    that may match the filters or None, if no condition can be derived.
+
+    Only clauses of purely conjunctive filters can be pushed down, since the
+    pre-selection must never exclude real estates the sieve would keep.
+    """
+
+    if (operations := conjunctive_operations(filters)) is None:
+        return None
+
+    condition = None
+
+    for option, operator, _, _, value, raw_value in operations:
+        if option == "geo" and operator in REGIONS:
+            if (expression := geo_expression(model, value)) is not None:
+                condition = (
+                    expression if condition is None else condition & expression
+                )
+
+            continue
+
+        if (column := columns.get(option)) is None:
+            continue
+
+        if (field := getattr(model, column, None)) is None:
+            continue
+
+        if (expression := sql_expression(field, operator, value, raw_value)) is None:
+            continue
+
+        condition = expression if condition is None else condition & expression
+
+    return condition
+
+
+def filter_options(filters: Optional[str]) -> Optional[set[str]]:
+    """Returns the names of the options used in the
+    filters or None, if the filters cannot be parsed.
+    """
+
+    if not filters:
+        return set()
+
+    try:
+        return {clause.operation[0] for clause in parse_filters(filters)}
+    except (InvalidFilterOption, InvalidFilterSyntax, SievingError):
+        return None
+
+
+def geo_regions(filters: Optional[str]) -> list[Region]:
+    """Returns the geographic regions, all real estates
+    matching the filters must be located in.
+    """
+
+    if (operations := conjunctive_operations(filters)) is None:
+        return []
+
+    return [
+        value
+        for option, operator, _, _, value, _ in operations
+        if option == "geo" and operator in REGIONS
+    ]
+
+
+def conjunctive_operations(
+    filters: Optional[str],
+) -> Optional[list[CompiledOperation]]:
+    """Returns the compiled operations of a purely
+    conjunctive filter or None, if the filter is not.
+    """
+
+    if not filters or NON_CONJUNCTIVE.search(filters):
+        return None
+
+    try:
+        return [
+            compile_operation(clause)
+            for clause in CONJUNCTION.split(filters.strip())
+        ]
+    except (InvalidFilterOption, SievingError):
+        return None
+
+
+def geo_expression(model, region: Region):
+    """Returns an SQL expression selecting records of the model
+    within the bounding box of the region or None, if the
+    model does not store coordinates.
+    """
+
+    try:
+        latitude, longitude = model.breitengrad, model.laengengrad
+    except AttributeError:
+        return None
+
+    bounds = region.bounds
+    return latitude.between(bounds.south, bounds.north) & longitude.between(
+        bounds.west, bounds.east
+    )
+
+
+def sql_expression(field, operator: Operator, value: Any, raw_value: str):
+    """Returns an SQL expression on the field, which pre-selects
+    the values that may match the operation or None, if the
+    operation cannot be expressed in SQL.
+
+    Only text columns are compared with the raw literals, since the
+    database would cast them to other column types on its own terms,
+    e.g. MySQL casts "true" to 0 when comparing it to a boolean.
+    """
+
+    if not isinstance(field, (CharField, TextField)):
+        return None
+
+    if isinstance(value, Members):
+        if operator == Operator.IN:
+            return field.in_(sorted(value.literals))
+
+        if operator == Operator.NI:
+            return field.not_in(sorted(value.literals)) | field.is_null()
+
+        return None
+
+    if operator == Operator.EG:
+        if (prefix := glob_prefix(raw_value)) == raw_value:
+            return field == raw_value
+
+        if prefix:
+            return field.startswith(prefix)
+
+    return None
+
+
+@cached(register("globs", LRUCache(maxsize=1024)))
+def compile_glob(pattern: str) -> Pattern:
+    """Translates a glob pattern into a compiled regular expression."""
+
+    return compile_(translate(pattern))
+
+
+def glob_prefix(pattern: str) -> str:
+    """Returns the literal prefix of a glob pattern."""
+
+    if (match := WILDCARDS.search(pattern)) is None:
+        return pattern
+
+    return pattern[: match.start()]
+
+
 def get_option(option: str) -> Option:
-    """Returns the respective option and format."""
+    """Returns the respective filterable option."""
 
     try:
-        option_setting = OPTIONS[option]
+        return FILTER_OPTIONS[option]
     except KeyError:
         raise InvalidFilterOption(option) from None
-
-    try:
-        option_format, option_func = option_setting
-    except TypeError:
-        return (option_setting, None)
-    else:
-        return (option_func, option_format)
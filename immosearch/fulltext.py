@@ -0,0 +1,314 @@
+"""Full-text search over real estate free texts."""
+
+from bisect import bisect_left
+from collections import Counter
+from hashlib import blake2b
+from math import log
+from re import compile as compile_
+from threading import Lock
+from typing import Hashable, Iterator
+
+from peewee import fn
+
+from mdb import Customer
+from openimmodb import Immobilie
+
+from immosearch.cache import LRUCache
+from immosearch.changes import get_feed
+from immosearch.index import load_real_estates
+from immosearch.lib import iterbatches
+from immosearch.orm import ChangeLog
+
+
+__all__ = ["InvertedIndex", "get_index", "search", "tokenize"]
+
+
+FIELDS = ("objektbeschreibung", "dreizeiler", "lage", "ausstatt_beschr")
+FOLDING = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+STOPWORDS = frozenset(
+    {
+        "aber",
+        "als",
+        "am",
+        "an",
+        "auch",
+        "auf",
+        "aus",
+        "bei",
+        "das",
+        "dem",
+        "den",
+        "der",
+        "des",
+        "die",
+        "ein",
+        "eine",
+        "einem",
+        "einen",
+        "einer",
+        "es",
+        "fuer",
+        "im",
+        "in",
+        "ist",
+        "mit",
+        "nach",
+        "oder",
+        "sich",
+        "sie",
+        "sind",
+        "und",
+        "von",
+        "vom",
+        "zu",
+        "zum",
+        "zur",
+    }
+)
+TOKEN = compile_("\\w+")
+MAX_INDEXES = 32  # per worker
+INDEXES = LRUCache(MAX_INDEXES)
+LOCKS = {}
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Yields folded tokens of a German text."""
+
+    for token in TOKEN.findall(text.casefold().translate(FOLDING)):
+        if token not in STOPWORDS:
+            yield token
+
+
+def get_text(real_estate) -> str:
+    """Returns the searchable free texts of a real estate DOM."""
+
+    if (freitexte := real_estate.freitexte) is None:
+        return ""
+
+    return "\n".join(
+        str(text) for field in FIELDS if (text := getattr(freitexte, field, None))
+    )
+
+
+class InvertedIndex:
+    """An inverted index of documents' terms."""
+
+    def __init__(self):
+        """Initializes an empty index."""
+        self.postings = {}
+        self.documents = {}
+        self.total_length = 0
+        self._terms = None
+        self._owned = None  # Terms with postings of their own or None for all.
+
+    def __len__(self) -> int:
+        """Returns the amount of indexed documents."""
+        return len(self.documents)
+
+    def __contains__(self, document: Hashable) -> bool:
+        """Checks whether the document is indexed."""
+        return document in self.documents
+
+    @property
+    def terms(self) -> list[str]:
+        """Returns a sorted list of all terms."""
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+
+        return self._terms
+
+    def copy(self):
+        """Returns a copy of the index, which can be updated separately.
+
+        The postings are shared with the original until
+        the copy updates them, so copying is cheap.
+        """
+        index = type(self)()
+        index.postings = dict(self.postings)
+        index.documents = dict(self.documents)
+        index.total_length = self.total_length
+        index._terms = self._terms
+        index._owned = set()
+        return index
+
+    def _postings(self, term: str) -> dict:
+        """Returns the term's postings to be modified."""
+        postings = self.postings[term]
+
+        if self._owned is None or term in self._owned:
+            return postings
+
+        postings = self.postings[term] = dict(postings)
+        self._owned.add(term)
+        return postings
+
+    def update(self, document: Hashable, text: str) -> bool:
+        """Indexes the document's text, unless it is unchanged.
+        Returns True iff the document was (re-)indexed.
+        """
+        fingerprint = blake2b(text.encode(), digest_size=16).digest()
+
+        try:
+            old_fingerprint, *_ = self.documents[document]
+        except KeyError:
+            pass
+        else:
+            if old_fingerprint == fingerprint:
+                return False
+
+            self.remove(document)
+
+        frequencies = Counter(tokenize(text))
+        length = sum(frequencies.values())
+        self.documents[document] = (fingerprint, length, tuple(frequencies))
+        self.total_length += length
+
+        for term, frequency in frequencies.items():
+            if term in self.postings:
+                self._postings(term)[document] = frequency
+            else:
+                self.postings[term] = {document: frequency}
+                self._terms = None
+
+                if self._owned is not None:
+                    self._owned.add(term)
+
+        return True
+
+    def remove(self, document: Hashable):
+        """Removes the document from the index."""
+        try:
+            _, length, terms = self.documents.pop(document)
+        except KeyError:
+            return
+
+        self.total_length -= length
+
+        for term in terms:
+            postings = self._postings(term)
+            del postings[document]
+
+            if not postings:
+                del self.postings[term]
+                self._terms = None
+
+    def expand(self, token: str) -> Iterator[str]:
+        """Yields terms starting with the token."""
+        terms = self.terms
+
+        for index in range(bisect_left(terms, token), len(terms)):
+            if not (term := terms[index]).startswith(token):
+                break
+
+            yield term
+
+    def idf(self, term: str) -> float:
+        """Returns the inverse document frequency of a term."""
+        frequency = len(self.postings[term])
+        return log(1 + (len(self.documents) - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, query: str) -> list[tuple[Hashable, float]]:
+        """Returns (<document>, <score>) tuples of documents, containing
+        terms starting with all tokens of the query, by descending
+        Okapi BM25 score.
+        """
+        if not self.documents:
+            return []
+
+        average_length = self.total_length / len(self.documents) or 1
+        scores = None
+
+        for token in set(tokenize(query)):
+            token_scores = Counter()
+
+            for term in self.expand(token):
+                idf = self.idf(term)
+
+                for document, frequency in self.postings[term].items():
+                    _, length, _ = self.documents[document]
+                    norm = K1 * (1 - B + B * length / average_length)
+                    token_scores[document] += (
+                        idf * frequency * (K1 + 1) / (frequency + norm)
+                    )
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = Counter(
+                    {
+                        document: score + token_scores[document]
+                        for document, score in scores.items()
+                        if document in token_scores
+                    }
+                )
+
+        if scores is None:
+            return []
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def get_token(customer: Customer) -> int:
+    """Returns the customer's latest change token."""
+
+    return (
+        ChangeLog.select(fn.MAX(ChangeLog.id))
+        .where(ChangeLog.customer == customer)
+        .scalar()
+        or 0
+    )
+
+
+def build(customer: Customer) -> InvertedIndex:
+    """Indexes all of the customer's real estates batch by batch."""
+
+    index = InvertedIndex()
+
+    for immobilie in iterbatches(Immobilie.by_customer(customer), Immobilie.id):
+        index.update(immobilie.id, get_text(immobilie.to_dom()))
+
+    return index
+
+
+def get_index(customer: Customer) -> InvertedIndex:
+    """Returns the inverted index of the customer's real estates.
+
+    The index is built once per worker and then kept current by
+    re-indexing the real estates, which the change log reports as
+    changed by the search index synchronization since. All changes
+    of a feed are applied to one copy, so that published indexes are
+    never mutated while other threads search them. Only the indexes
+    of the MAX_INDEXES most recently searched customers are kept.
+    """
+
+    with LOCKS.setdefault(customer.id, Lock()):
+        if (cached := INDEXES.get(customer.id)) is None:
+            token = get_token(customer)
+            INDEXES.set(customer.id, (token, index := build(customer)))
+            return index
+
+        token, index = cached
+
+        if not (feed := get_feed(customer, str(token))).token > token:
+            return index
+
+        index = index.copy()
+
+        for immobilie, dom in load_real_estates(feed.changed):
+            index.update(immobilie.id, get_text(dom))
+
+        for immobilie, _ in feed.removed:
+            index.remove(immobilie)
+
+        INDEXES.set(customer.id, (feed.token, index))
+        return index
+
+
+def search(customer: Customer, query: str) -> list[int]:
+    """Returns the IDs of the customer's real estates
+    matching the query by descending relevance.
+    """
+
+    return [document for document, _ in get_index(customer).search(query)]
@@ -0,0 +1,95 @@
+"""Geographic real estate search."""
+
+from math import asin, cos, radians, sin, sqrt
+from typing import NamedTuple
+
+
+__all__ = ["BoundingBox", "Circle", "Region", "distance"]
+
+
+EARTH_RADIUS = 6371.0  # km
+KM_PER_DEGREE = 111.195  # km per degree of latitude
+
+Point = tuple[float, float]
+
+
+def distance(point: Point, other: Point) -> float:
+    """Returns the great-circle distance between two points in km."""
+
+    lat1, lon1 = map(radians, point)
+    lat2, lon2 = map(radians, other)
+    hav = (
+        sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * asin(sqrt(hav))
+
+
+class BoundingBox(NamedTuple):
+    """A box of latitudes and longitudes."""
+
+    south: float
+    west: float
+    north: float
+    east: float
+
+    @classmethod
+    def fromlist(cls, values: list[float]):
+        """Creates a bounding box from a [south;west;north;east] list."""
+        south, west, north, east = map(float, values)
+        return cls(
+            min(south, north), min(west, east), max(south, north), max(west, east)
+        )
+
+    @property
+    def center(self) -> Point:
+        """Returns the center of the box."""
+        return ((self.south + self.north) / 2, (self.west + self.east) / 2)
+
+    @property
+    def bounds(self):
+        """Returns the bounding box."""
+        return self
+
+    def contains(self, point: Point) -> bool:
+        """Checks whether the point is inside the box."""
+        lat, lon = point
+        return self.south <= lat <= self.north and self.west <= lon <= self.east
+
+
+class Circle(NamedTuple):
+    """A circle of a radius in km around a center point."""
+
+    lat: float
+    lon: float
+    radius: float
+
+    @classmethod
+    def fromlist(cls, values: list[float]):
+        """Creates a circle from a [lat;lon;radius] list."""
+        lat, lon, radius = map(float, values)
+        return cls(lat, lon, radius)
+
+    @property
+    def center(self) -> Point:
+        """Returns the center point."""
+        return (self.lat, self.lon)
+
+    @property
+    def bounds(self) -> BoundingBox:
+        """Returns the bounding box of the circle."""
+        lat_delta = self.radius / KM_PER_DEGREE
+        lon_delta = self.radius / (KM_PER_DEGREE * max(cos(radians(self.lat)), 0.01))
+        return BoundingBox(
+            self.lat - lat_delta,
+            self.lon - lon_delta,
+            self.lat + lat_delta,
+            self.lon + lon_delta,
+        )
+
+    def contains(self, point: Point) -> bool:
+        """Checks whether the point is inside the circle."""
+        return distance(self.center, point) <= self.radius
+
+
+Region = BoundingBox | Circle
@@ -0,0 +1,173 @@
+"""Import time of modules, measured with -X importtime, against a budget."""
+
+from argparse import ArgumentParser, Namespace
+from logging import INFO, basicConfig, getLogger
+from subprocess import CalledProcessError, run as run_process
+from sys import executable
+from typing import Iterable, Iterator, NamedTuple
+
+
+__all__ = ["Import", "Measurement", "main", "measure"]
+
+
+LOGGER = getLogger("immosearch-importtime")
+PREFIX = "import time:"
+MODULES = ("immosearch.wsgi",)
+BUDGET = 500  # milliseconds
+REPEAT = 5
+TOP = 10
+
+
+class Import(NamedTuple):
+    """Timing of an imported module in microseconds."""
+
+    module: str
+    own: int
+    cumulative: int
+
+
+class Measurement(NamedTuple):
+    """Modules imported by importing a module,
+    apart from those imported at interpreter startup.
+    """
+
+    module: str
+    imports: list[Import]
+
+    @property
+    def total(self) -> float:
+        """Returns the total import time in milliseconds."""
+        return sum(entry.own for entry in self.imports) / 1000
+
+    def top(self, amount: int = TOP) -> list[Import]:
+        """Returns the modules, which took longest to import themselves."""
+        imports = sorted(self.imports, key=lambda entry: entry.own, reverse=True)
+        return imports[:amount]
+
+    def imported(self, module: str) -> bool:
+        """Checks whether the module or one of its submodules was imported."""
+        return any(
+            entry.module == module or entry.module.startswith(f"{module}.")
+            for entry in self.imports
+        )
+
+
+def parse(output: str) -> Iterator[Import]:
+    """Yields the imports logged by -X importtime."""
+
+    for line in output.splitlines():
+        if not line.startswith(PREFIX):
+            continue
+
+        own, cumulative, module = line[len(PREFIX) :].split("|")
+
+        try:
+            yield Import(module.strip(), int(own), int(cumulative))
+        except ValueError:
+            continue  # Header.
+
+
+def get_imports(code: str) -> list[Import]:
+    """Runs the code in a fresh interpreter and returns its imports."""
+
+    process = run_process(
+        [executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return list(parse(process.stderr))
+
+
+def measure(module: str, repeat: int = REPEAT) -> Measurement:
+    """Imports the module repeatedly and returns the fastest measurement."""
+
+    startup = {entry.module for entry in get_imports("pass")}
+    measurements = (
+        Measurement(
+            module,
+            [
+                entry
+                for entry in get_imports(f"import {module}")
+                if entry.module not in startup
+            ],
+        )
+        for _ in range(repeat)
+    )
+    return min(measurements, key=lambda measurement: measurement.total)
+
+
+def check(
+    measurement: Measurement, budget: float, forbidden: Iterable[str]
+) -> list[str]:
+    """Returns the violations of the budget and the forbidden modules."""
+
+    violations = []
+
+    if measurement.total > budget:
+        violations.append(
+            f"{measurement.module} takes {measurement.total:.1f} ms to import, "
+            f"exceeding the budget of {budget:.1f} ms"
+        )
+
+    for module in forbidden:
+        if measurement.imported(module):
+            violations.append(f"{measurement.module} imports {module}")
+
+    return violations
+
+
+def get_args() -> Namespace:
+    """Returns the parsed command line arguments."""
+
+    parser = ArgumentParser(description="Check the import time of modules.")
+    parser.add_argument("module", nargs="*", default=MODULES, help="modules to import")
+    parser.add_argument(
+        "-b", "--budget", type=float, default=BUDGET, help="budget in milliseconds"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=REPEAT, help="imports per module"
+    )
+    parser.add_argument(
+        "-f",
+        "--forbid",
+        nargs="+",
+        default=(),
+        help="modules, which must not be imported eagerly",
+    )
+    parser.add_argument(
+        "-t", "--top", type=int, default=TOP, help="slowest modules to list"
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Measures the import time of the modules and checks the budget."""
+
+    basicConfig(level=INFO, format="%(message)s")
+    args = get_args()
+    violations = []
+
+    for module in args.module:
+        try:
+            measurement = measure(module, repeat=args.repeat)
+        except CalledProcessError as error:
+            LOGGER.error("Cannot import %s:\n%s", module, error.stderr)
+            return 2
+
+        LOGGER.info(
+            "%s: %.1f ms, %i modules",
+            module,
+            measurement.total,
+            len(measurement.imports),
+        )
+
+        for entry in measurement.top(args.top):
+            LOGGER.info("%10.1f ms  %s", entry.own / 1000, entry.module)
+
+        violations.extend(check(measurement, args.budget, args.forbid))
+
+    for violation in violations:
+        LOGGER.error("%s.", violation)
+
+    return 1 if violations else 0
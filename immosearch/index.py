@@ -0,0 +1,358 @@
+"""Persistent search index of real estates."""
+
+from argparse import ArgumentParser, Namespace
+from hashlib import sha256
+from itertools import islice
+from logging import INFO, basicConfig, getLogger
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+from mdb import Customer
+from openimmodb import Immobilie
+
+from immosearch.cache import get_cache
+from immosearch.changes import Action, log_changes
+from immosearch.filter import FilterableRealEstate
+from immosearch.filter import filter_options
+from immosearch.filter import geo_expression
+from immosearch.filter import sql_condition
+from immosearch.geo import Region, distance
+from immosearch.lib import BATCH_SIZE, iterbatches, lazy_import
+from immosearch.options import INDEX_COLUMNS, INDEXED_OPTIONS
+from immosearch.orm import IndexState, RealEstateIndex
+from immosearch.saved import Matcher
+
+pyxb = lazy_import("pyxb")
+
+
+__all__ = [
+    "INDEXED_OPTIONS",
+    "Changes",
+    "IndexedRealEstate",
+    "get_outside",
+    "get_records",
+    "is_complete",
+    "is_indexable",
+    "load_real_estates",
+    "sync",
+]
+
+
+LOGGER = getLogger("immosearch.index")
+COMPLETENESS_TTL = 60  # seconds
+LIST_SEPARATOR = ";"
+SPECIAL_FIELDS = {
+    "id",
+    "immobilie",
+    "customer",
+    "fingerprint",
+    "indexed",
+    "objekttypen",
+    "breitengrad",
+    "laengengrad",
+}
+# Attributes of FilterableRealEstate, which are stored verbatim.
+ATTRIBUTES = tuple(
+    field.name
+    for field in RealEstateIndex._meta.sorted_fields  # pylint: disable=W0212
+    if field.name not in SPECIAL_FIELDS
+)
+
+
+class Changes(NamedTuple):
+    """IDs of real estates changed by a synchronization."""
+
+    added: list[int]
+    modified: list[int]
+    removed: list[int]
+
+
+class IndexedRealEstate:
+    """A filterable real estate backed by a search index record."""
+
+    evaluate = FilterableRealEstate.evaluate
+    apply = FilterableRealEstate.apply
+
+    def __init__(self, record: RealEstateIndex, origin: Optional[tuple] = None):
+        """Sets the index record and an optional
+        origin for distance calculation.
+        """
+        self.record = record
+        self.origin = origin
+
+    def __getattr__(self, attribute: str) -> Any:
+        """Returns the respective indexed attribute."""
+        if attribute in ATTRIBUTES:
+            return getattr(self.record, attribute)
+
+        raise AttributeError(f"Attribute not indexed: {attribute}.")
+
+    @property
+    def objekttypen(self) -> list[str]:
+        """Returns the object's types."""
+        if not self.record.objekttypen:
+            return []
+
+        return self.record.objekttypen.split(LIST_SEPARATOR)
+
+    @property
+    def geokoordinaten(self) -> Optional[tuple[float, float]]:
+        """Returns the latitude and longitude."""
+        if self.record.breitengrad is None or self.record.laengengrad is None:
+            return None
+
+        return (self.record.breitengrad, self.record.laengengrad)
+
+    @property
+    def distanz(self) -> Optional[float]:
+        """Returns the distance to the origin in km."""
+        if self.origin is None or (geokoordinaten := self.geokoordinaten) is None:
+            return None
+
+        return distance(self.origin, geokoordinaten)
+
+
+def get_values(dom) -> dict[str, Any]:
+    """Returns the index values of a real estate DOM."""
+
+    filterable = FilterableRealEstate(dom)
+    values = {}
+
+    for attribute in ATTRIBUTES:
+        try:
+            values[attribute] = getattr(filterable, attribute)
+        except (AttributeError, TypeError, ValueError):
+            values[attribute] = None
+
+    try:
+        values["objekttypen"] = LIST_SEPARATOR.join(filterable.objekttypen) or None
+    except AttributeError:
+        values["objekttypen"] = None
+
+    try:
+        geokoordinaten = filterable.geokoordinaten
+    except (AttributeError, TypeError, ValueError):
+        geokoordinaten = None
+
+    values["breitengrad"], values["laengengrad"] = geokoordinaten or (None, None)
+    return values
+
+
+def get_fingerprint(dom, values: dict[str, Any]) -> str:
+    """Returns a fingerprint of the real estate's content."""
+
+    try:
+        content = dom.toxml(encoding="utf-8")
+    except pyxb.PyXBException:
+        content = repr(sorted(values.items())).encode()
+
+    return sha256(content).hexdigest()
+
+
+def get_marker(customer: Customer) -> str:
+    """Returns a marker of the customer's real estate records,
+    which changes whenever a record is added, modified or removed.
+    """
+
+    fields = Immobilie._meta.sorted_fields  # pylint: disable=W0212
+    marker = sha256()
+
+    for row in (
+        Immobilie.by_customer(customer)
+        .select(*fields)
+        .order_by(Immobilie.id)
+        .tuples()
+        .iterator()
+    ):
+        marker.update(repr(row).encode())
+
+    return marker.hexdigest()
+
+
+def sync(customer: Customer) -> Changes:
+    """Synchronizes the search index of the customer's real estates,
+    logs the changes to the change log and matches the added and
+    modified real estates against the customer's saved searches.
+    """
+
+    # Taken beforehand, so that concurrent changes render the index stale.
+    marker = get_marker(customer)
+    indexed = {
+        immobilie: (fingerprint, objektnr_extern)
+        for immobilie, fingerprint, objektnr_extern in RealEstateIndex.select(
+            RealEstateIndex.immobilie,
+            RealEstateIndex.fingerprint,
+            RealEstateIndex.objektnr_extern,
+        )
+        .where(RealEstateIndex.customer == customer)
+        .tuples()
+    }
+    changes = Changes([], [], [])
+    log = []
+    matcher = Matcher(customer)
+
+    for immobilie in iterbatches(Immobilie.by_customer(customer), Immobilie.id):
+        dom = immobilie.to_dom()
+        values = get_values(dom)
+        fingerprint = get_fingerprint(dom, values)
+
+        try:
+            old_fingerprint, _ = indexed.pop(immobilie.id)
+        except KeyError:
+            RealEstateIndex.create(
+                immobilie=immobilie.id,
+                customer=customer,
+                fingerprint=fingerprint,
+                **values,
+            )
+            changes.added.append(immobilie.id)
+            log.append((immobilie.id, values["objektnr_extern"], Action.ADDED))
+            matcher.match(immobilie.id, dom)
+            continue
+
+        if old_fingerprint != fingerprint:
+            RealEstateIndex.update(fingerprint=fingerprint, **values).where(
+                RealEstateIndex.immobilie == immobilie.id
+            ).execute()
+            changes.modified.append(immobilie.id)
+            log.append((immobilie.id, values["objektnr_extern"], Action.MODIFIED))
+            matcher.match(immobilie.id, dom)
+
+    if indexed:
+        RealEstateIndex.delete().where(
+            RealEstateIndex.immobilie << list(indexed)
+        ).execute()
+        changes.removed.extend(indexed)
+        log.extend(
+            (immobilie, objektnr_extern, Action.REMOVED)
+            for immobilie, (_, objektnr_extern) in indexed.items()
+        )
+        matcher.remove(indexed)
+
+    log_changes(customer, log)
+    matcher.save()
+    IndexState.replace(customer=customer, marker=marker).execute()
+    return changes
+
+
+def is_complete(customer: Customer) -> bool:
+    """Checks whether the index holds exactly the customer's
+    real estates in their current state.
+
+    The result is cached for COMPLETENESS_TTL seconds.
+    """
+
+    cache = get_cache("completeness")
+
+    if (complete := cache.get(customer.id)) is None:
+        complete = not is_stale(customer)
+        cache.set(customer.id, complete, ttl=COMPLETENESS_TTL)
+
+    return complete
+
+
+def is_stale(customer: Customer) -> bool:
+    """Checks whether the customer's real estate records were
+    added, modified or removed since the index was synchronized.
+    """
+
+    try:
+        state = IndexState.get(IndexState.customer == customer)
+    except IndexState.DoesNotExist:
+        return True
+
+    return state.marker != get_marker(customer)
+
+
+def is_indexable(filters: Optional[str], sort: Optional[Iterable]) -> bool:
+    """Checks whether the filters and sort options
+    can be evaluated on index records alone.
+    """
+
+    if (options := filter_options(filters)) is None:
+        return False
+
+    if sort is not None:
+        options |= {option for option, _ in sort}
+
+    return options <= INDEXED_OPTIONS
+
+
+def get_records(customer: Customer, filters: Optional[str]) -> Iterator:
+    """Yields (<record>, <record>) tuples of the customer's index
+    records, pre-selected by the filters where possible.
+    """
+
+    query = RealEstateIndex.select().where(RealEstateIndex.customer == customer)
+
+    if (
+        condition := sql_condition(filters, RealEstateIndex, columns=INDEX_COLUMNS)
+    ) is not None:
+        query = query.where(condition)
+
+    for record in iterbatches(query, RealEstateIndex.id):
+        yield (record, record)
+
+
+def get_outside(customer: Customer, region: Region):
+    """Returns a query of the IDs of the customer's indexed real
+    estates, which are located outside of the region's bounds.
+
+    Real estates, which are not indexed yet, are not selected,
+    so that excluding the IDs never drops a possible match.
+    """
+
+    return RealEstateIndex.select(RealEstateIndex.immobilie).where(
+        (RealEstateIndex.customer == customer)
+        & (
+            ~geo_expression(RealEstateIndex, region)
+            | RealEstateIndex.breitengrad.is_null()
+            | RealEstateIndex.laengengrad.is_null()
+        )
+    )
+
+
+def load_real_estates(idents: Iterable[int]) -> Iterator:
+    """Yields (<orm>, <dom>) tuples of the
+    real estates in the order of the IDs.
+    """
+
+    idents = iter(idents)
+
+    while batch := list(islice(idents, BATCH_SIZE)):
+        real_estates = {
+            immobilie.id: immobilie
+            for immobilie in Immobilie.select().where(Immobilie.id << batch)
+        }
+
+        for ident in batch:
+            if (immobilie := real_estates.get(ident)) is not None:
+                yield (immobilie, immobilie.to_dom())
+
+
+def get_args() -> Namespace:
+    """Returns the parsed command line arguments."""
+
+    parser = ArgumentParser(description="Synchronize the immosearch index.")
+    parser.add_argument("customer", type=int, nargs="*", help="customer IDs")
+    return parser.parse_args()
+
+
+def main():
+    """Synchronizes the search index of the given or all customers."""
+
+    basicConfig(level=INFO)
+    args = get_args()
+    customers = Customer.select(cascade=True)
+
+    if args.customer:
+        customers = customers.where(Customer.id << args.customer)
+
+    for customer in customers:
+        changes = sync(customer)
+        LOGGER.info(
+            "Customer %s: %i added, %i modified, %i removed.",
+            customer.id,
+            len(changes.added),
+            len(changes.modified),
+            len(changes.removed),
+        )
@@ -3,12 +3,26 @@
 from contextlib import suppress
 from datetime import datetime
 from enum import Enum
-from typing import Any
-
-
-__all__ = ["BOOLEAN", "Operator", "cast"]
-
-
+from importlib import import_module
+from importlib.util import find_spec
+from sys import modules
+from types import ModuleType
+from typing import Any, Iterable, Iterator, Optional
+
+
+__all__ = [
+    "BATCH_SIZE",
+    "BOOLEAN",
+    "Members",
+    "Operator",
+    "cast",
+    "iterbatches",
+    "lazy_import",
+    "split_list",
+]
+
+
+BATCH_SIZE = 100
 BOOLEAN = {"true".casefold(): True, "false".casefold(): False}
 
 
@@ -39,18 +53,55 @@ class Operator(Enum):
     NI = "∉"  # Element not in iterable
     CO = "∋"  # List contains element
     CN = "∌"  # List does not contain element
+    WC = "@"  # Within circle
+    WB = "⊂"  # Within bounding box
+
+
+class Members(frozenset):
+    """A frozen set of list literal members with type-aware lookup.
+
+    Items are looked up by their cast value and, if they are strings,
+    by the raw literals, so that e.g. the ZIP code "01067" is found
+    in the list literal "[01067;01069]" although it was cast to int.
+    """
+
+    def __new__(cls, literals: Iterable[str], typ: type = None):
+        literals = frozenset(literals)
+        members = super().__new__(cls, (cast(literal, typ) for literal in literals))
+        members.literals = literals
+        return members
+
+    def __contains__(self, item: Any) -> bool:
+        """Checks whether the item is a member."""
+        try:
+            if super().__contains__(item):
+                return True
+        except TypeError:  # Unhashable item.
+            return False
+
+        return isinstance(item, str) and item in self.literals
+
+
+def split_list(value: str) -> Optional[list[str]]:
+    """Splits a list literal into its raw items.
+    Returns None if the value is not a list literal.
+    """
+    if value.startswith(Delim.SL.value) and value.endswith(Delim.EL.value):
+        return [item.strip() for item in value[1:-1].split(Delim.IS.value)]
+
+    return None
 
 
 def cast(value: str, typ: type = None) -> Any:  # pylint: disable=R0911
     """Type cast a raw string value for a certain type
     XXX: Nested lists are not supported, yet.
     """
+    if (items := split_list(value)) is not None:
+        return [cast(item, typ) for item in items]
+
     if typ is not None:
         return typ(value)
 
-    if value.startswith(Delim.SL.value) and value.endswith(Delim.EL.value):
-        return [cast(e.strip()) for e in value[1:-1].split(Delim.IS.value)]
-
     with suppress(ValueError):
         return int(value)
 
@@ -64,3 +115,59 @@ def cast(value: str, typ: type = None) -> Any:  # pylint: disable=R0911
         return datetime.fromisoformat(value)
 
     return value
+
+
+def iterbatches(query, key, size: int = BATCH_SIZE) -> Iterator[Any]:
+    """Yields records of a peewee select query in batches of the given size.
+
+    Batches are fetched by keyset pagination on the given key field,
+    so that at most one batch of records is held by the client at a time.
+    """
+    last = None
+
+    while True:
+        batch = query.order_by(key)
+
+        if last is not None:
+            batch = batch.where(key > last)
+
+        count = 0
+
+        for count, record in enumerate(batch.limit(size).iterator(), start=1):
+            last = getattr(record, key.name)
+            yield record
+
+        if count < size:
+            return
+
+
+class LazyModule(ModuleType):
+    """A module, which is imported on the first access of its attributes.
+
+    The module is imported regularly, i.e. thread-safe and into
+    sys.modules, so that "from x import y" statements elsewhere
+    see the executed module rather than this placeholder.
+    """
+
+    def __getattr__(self, attribute: str) -> Any:
+        """Imports the module and returns the attribute."""
+        return getattr(import_module(self.__name__), attribute)
+
+    def __dir__(self) -> list[str]:
+        """Imports the module and returns its attributes."""
+        return dir(import_module(self.__name__))
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns the respective module, which is
+    imported on the first access of its attributes.
+    """
+    try:
+        return modules[name]
+    except KeyError:
+        pass
+
+    if find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    return LazyModule(name)
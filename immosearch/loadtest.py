@@ -0,0 +1,350 @@
+"""Load tests of the WSGI application on seeded SQLite stand-ins."""
+
+from argparse import ArgumentParser, Namespace
+from http.client import HTTPConnection
+from itertools import chain, count, islice
+from logging import INFO, basicConfig, getLogger
+from pathlib import Path
+from random import Random
+from resource import RUSAGE_SELF, getrusage
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter
+from typing import Callable, Iterator, NamedTuple
+from urllib.parse import urlencode
+
+from werkzeug.serving import make_server
+
+from mdb import Customer
+from openimmodb import Anhang, Immobilie
+
+from immosearch.cache import stats as cache_stats
+from immosearch.config import get_config
+from immosearch.orm import Blacklist, ChangeLog, RealEstateIndex
+from immosearch.selector import TITLEPIC_SEARCH_GROUPS
+from immosearch.synthetic import create, portfolio, related_models, sqlite_database
+from immosearch.wsgi import APPLICATION
+
+
+__all__ = ["Report", "main", "populate", "run"]
+
+
+LOGGER = getLogger("immosearch-loadtest")
+CUSTOMERS = 5
+SIZE = 500  # real estates per customer
+ATTACHMENTS = 3  # per real estate
+CONCURRENCY = 8
+REQUESTS = 2_000
+WARMUP = 50
+PERCENTILES = (50, 95, 99)
+# (<name>, <query arguments>, <weight>)
+SCENARIOS = (
+    ("plain", {}, 10),
+    ("filter", {"filter": "objektart==wohnung and zimmer>=3"}, 20),
+    ("filter+sort", {"filter": "kaltmiete<=900", "sort": "kaltmiete"}, 15),
+    (
+        "sort+page",
+        {"sort": "ort,wohnflaeche:desc", "paging": "limit:20,page:{page}"},
+        20,
+    ),
+    (
+        "include",
+        {"include": "titlepic,freitexte", "paging": "limit:20,page:{page}"},
+        15,
+    ),
+    ("geo", {"filter": "geo@[52.52;13.405;10]", "sort": "distanz"}, 5),
+    ("attachment", None, 10),
+    ("checksum", {"sha256sum": ""}, 5),
+)
+
+
+class Sample(NamedTuple):
+    """A timed request."""
+
+    scenario: str
+    status: int
+    duration: float
+
+
+class Report(NamedTuple):
+    """Summary of a load test.
+
+    Only successful requests count towards
+    the latencies and the throughput.
+    """
+
+    requests: int
+    failures: int
+    elapsed: float
+    statuses: dict[int, int]
+    latencies: dict[str, dict[int, float]]
+    peak_rss: int  # KiB
+    caches: dict[str, tuple[int, int]]
+
+    @property
+    def throughput(self) -> float:
+        """Returns the successfully handled requests per second."""
+        if not self.elapsed:
+            return 0.0
+
+        return (self.requests - self.failures) / self.elapsed
+
+
+def populate(customers: int = CUSTOMERS, size: int = SIZE, seed: int = 0) -> dict:
+    """Seeds the bound database and returns
+    the attachment IDs by customer ID.
+    """
+
+    groups = [group for group in TITLEPIC_SEARCH_GROUPS if group is not None]
+    attachments = {}
+
+    for cid in range(1, customers + 1):
+        customer = create(Customer, id=cid)
+        start = (cid - 1) * size + 1
+        attachments[cid] = []
+
+        for _, dom in portfolio(size, seed=seed + cid, start=start):
+            immobilie = Immobilie.from_dom(dom, customer)
+            immobilie.save()
+
+            for number in range(ATTACHMENTS):
+                attachments[cid].append(
+                    create(
+                        Anhang, immobilie=immobilie, gruppe=groups[number % len(groups)]
+                    ).id
+                )
+
+    return attachments
+
+
+def requests(attachments: dict, rng: Random) -> Iterator[tuple[str, str]]:
+    """Yields an endless stream of (<scenario>, <path>) tuples."""
+
+    cids = list(attachments)
+
+    while True:
+        name, args, _ = rng.choices(
+            SCENARIOS, weights=[weight for *_, weight in SCENARIOS]
+        )[0]
+        cid = rng.choice(cids)
+
+        if name in {"attachment", "checksum"}:
+            path = f"/attachment/{rng.choice(attachments[cid])}"
+        else:
+            path = f"/customer/{cid}"
+
+        if args:
+            page = str(rng.choice((0, 0, 0, 1, 2, 5)))
+            query = {key: value.format(page=page) for key, value in args.items()}
+            path = f"{path}?{urlencode(query)}"
+
+        yield (name, path)
+
+
+def in_process() -> Callable[[str], int]:
+    """Returns a function to request a path from the application in-process."""
+
+    client = APPLICATION.test_client()
+    return lambda path: client.get(path).status_code
+
+
+def over_http(port: int) -> Callable[[str], int]:
+    """Returns a function to request a path from a local server."""
+
+    connection = HTTPConnection("127.0.0.1", port)
+
+    def request(path: str) -> int:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    return request
+
+
+def worker(
+    get: Callable[[str], int], paths: Iterator[tuple[str, str]], samples: list
+):
+    """Issues the requests and records their samples."""
+
+    for scenario, path in paths:
+        start = perf_counter()
+        status = get(path)
+        samples.append(Sample(scenario, status, perf_counter() - start))
+
+
+def percentile(durations: list[float], percent: int) -> float:
+    """Returns the nearest-rank percentile of sorted durations."""
+
+    if not durations:
+        return 0.0
+
+    index = max(0, round(percent / 100 * len(durations) + 0.5) - 1)
+    return durations[min(index, len(durations) - 1)]
+
+
+def summarize(samples: list[Sample], elapsed: float) -> Report:
+    """Summarizes the samples."""
+
+    statuses = {}
+    failures = 0
+    durations = {"all": []}
+
+    for sample in samples:
+        statuses[sample.status] = statuses.get(sample.status, 0) + 1
+
+        if not 200 <= sample.status < 300:
+            failures += 1
+            continue
+
+        durations["all"].append(sample.duration)
+        durations.setdefault(sample.scenario, []).append(sample.duration)
+
+    latencies = {
+        name: {percent: percentile(sorted(values), percent) for percent in PERCENTILES}
+        for name, values in durations.items()
+    }
+    peak_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    return Report(
+        len(samples), failures, elapsed, statuses, latencies, peak_rss, cache_stats()
+    )
+
+
+def shares(amount: int, parts: int) -> Iterator[int]:
+    """Yields the shares of the amount split into parts."""
+
+    for part in range(parts):
+        yield amount // parts + (part < amount % parts)
+
+
+def drive(
+    clients: list[Callable[[str], int]], attachments: dict, amount: int, seed: int
+) -> Report:
+    """Runs the amount of requests on the clients concurrently."""
+
+    samples = [[] for _ in clients]
+    threads = [
+        Thread(
+            target=worker,
+            args=(
+                client,
+                islice(requests(attachments, Random(seed + number)), share),
+                samples[number],
+            ),
+            daemon=True,
+        )
+        for number, client, share in zip(
+            count(), clients, shares(amount, len(clients))
+        )
+    ]
+    start = perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = perf_counter() - start
+    return summarize(list(chain.from_iterable(samples)), elapsed)
+
+
+def use_cache(backend: str, directory: Path):
+    """Configures the local cache backend of the
+    caches, which are retrieved by name on demand.
+    """
+
+    get_config().read_dict(
+        {"cache": {"backend": backend, "directory": str(directory)}}
+    )
+
+
+def run(args: Namespace) -> Report:
+    """Seeds a database and runs the load test on it."""
+
+    models = related_models(Customer, Immobilie, Anhang)
+    models |= {Blacklist, ChangeLog, RealEstateIndex}
+
+    with TemporaryDirectory() as tmp, sqlite_database(
+        models, path=args.database or Path(tmp) / "immosearch.db"
+    ):
+        attachments = populate(args.customers, args.size, args.seed)
+        server = None
+
+        if args.cache is not None:
+            use_cache(args.cache, Path(tmp) / "cache")
+
+        if args.server:
+            server = make_server("127.0.0.1", args.port, APPLICATION, threaded=True)
+            Thread(target=server.serve_forever, daemon=True).start()
+            clients = [over_http(server.port) for _ in range(args.concurrency)]
+        else:
+            clients = [in_process() for _ in range(args.concurrency)]
+
+        try:
+            drive(clients, attachments, args.warmup, args.seed + args.concurrency)
+            return drive(clients, attachments, args.requests, args.seed)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+
+def get_args() -> Namespace:
+    """Returns the parsed command line arguments."""
+
+    parser = ArgumentParser(description="Load test the immosearch application.")
+    parser.add_argument(
+        "-c", "--customers", type=int, default=CUSTOMERS, help="seeded customers"
+    )
+    parser.add_argument(
+        "-s", "--size", type=int, default=SIZE, help="real estates per customer"
+    )
+    parser.add_argument(
+        "-n", "--requests", type=int, default=REQUESTS, help="measured requests"
+    )
+    parser.add_argument(
+        "-w", "--warmup", type=int, default=WARMUP, help="unmeasured requests"
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=CONCURRENCY, help="parallel clients"
+    )
+    parser.add_argument(
+        "--server", action="store_true", help="serve over HTTP on a local server"
+    )
+    parser.add_argument("--port", type=int, default=0, help="local server port")
+    parser.add_argument("--seed", type=int, default=0, help="traffic seed")
+    parser.add_argument(
+        "--database", type=Path, help="keep the seeded SQLite database here"
+    )
+    parser.add_argument(
+        "--cache", choices=("lru", "file"), help="local cache backend to use"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Runs the load test and logs its report."""
+
+    basicConfig(level=INFO, format="%(message)s")
+    report = run(get_args())
+    LOGGER.info(
+        "%i requests in %.2f s: %.1f requests/s, peak RSS %.1f MiB",
+        report.requests,
+        report.elapsed,
+        report.throughput,
+        report.peak_rss / 1024,
+    )
+    LOGGER.info("Status codes: %s, %i failed", report.statuses, report.failures)
+
+    for name, (hits, misses) in report.caches.items():
+        LOGGER.info("Cache %-14s %i hits, %i misses", name, hits, misses)
+
+    for name, latencies in report.latencies.items():
+        LOGGER.info(
+            "%-12s %s",
+            name,
+            "  ".join(
+                f"p{percent}={latency * 1000:8.2f} ms"
+                for percent, latency in latencies.items()
+            ),
+        )
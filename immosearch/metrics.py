@@ -0,0 +1,374 @@
+"""Prometheus-style metrics."""
+
+from bisect import bisect_left
+from collections import defaultdict
+from fcntl import LOCK_EX, flock
+from json import JSONDecodeError, dumps, loads
+from os import getpid, kill, replace
+from pathlib import Path
+from threading import Lock, local
+from time import monotonic
+from typing import Any, Iterable, Optional
+
+from immosearch.cache import stats
+from immosearch.config import get_config
+from immosearch.pool import EXHAUSTED
+from immosearch.pool import stats as pool_stats
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "REQUESTS",
+    "REQUEST_DURATION",
+    "STAGE_DURATION",
+    "QUERIES",
+    "ITEMS",
+    "FLAWED",
+    "collect",
+    "dump",
+    "render",
+]
+
+
+SECTION = "metrics"
+DUMP_INTERVAL = 1.0  # seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+REGISTRY = {}
+LAST_DUMP = [0.0]
+RETIRED = "retired"  # Name of the file of the counters of exited workers.
+
+
+class Counter:
+    """A monotonically increasing counter.
+
+    Each thread updates values of its own without a lock. They are
+    only summed up when the metrics are read, taking copies of the
+    threads' dicts, which is atomic under the GIL.
+    """
+
+    typ = "counter"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        """Sets name, description and label names and registers the counter."""
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = self.new()  # Values, which are set rather than updated.
+        self.lock = Lock()
+        self.local = local()
+        self.shards = []
+        REGISTRY[name] = self
+
+    def new(self) -> dict:
+        """Returns a new dict of values."""
+        return defaultdict(float)
+
+    @property
+    def shard(self) -> dict:
+        """Returns the values of the current thread."""
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = self.new()
+
+        with self.lock:
+            self.shards.append(values)
+
+        return values
+
+    def inc(self, *labels: Any, amount: float = 1):
+        """Increments the counter."""
+        self.shard[tuple(map(str, labels))] += amount
+
+    def set(self, value: float, *labels: Any):
+        """Sets the value, e.g. to mirror a count kept elsewhere."""
+        with self.lock:
+            self.values[tuple(map(str, labels))] = value
+
+    def to_json(self) -> list:
+        """Returns the values of all threads as JSON."""
+        with self.lock:
+            shards = [self.values, *self.shards]
+
+        total = {}
+
+        for shard in shards:
+            merge(total, self, dict(shard).items())
+
+        return [[list(labels), value] for labels, value in total.items()]
+
+    def samples(self, values: dict) -> Iterable[tuple[str, dict, float]]:
+        """Yields (<suffix>, <labels>, <value>) samples."""
+        for labels, value in values.items():
+            yield ("", dict(zip(self.labels, labels)), value)
+
+
+class Gauge(Counter):
+    """A value, that may go up and down.
+
+    Gauges of all workers are summed up when collected.
+    """
+
+    typ = "gauge"
+
+
+class Histogram(Counter):
+    """A histogram of observed values."""
+
+    typ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = BUCKETS,
+    ):
+        """Sets the buckets in addition to the counter's properties."""
+        self.buckets = buckets
+        super().__init__(name, description, labels)
+
+    def new(self) -> dict:
+        """Returns a new dict of bucket counts and sums."""
+        return defaultdict(lambda: [0] * (len(self.buckets) + 2))
+
+    def observe(self, value: float, *labels: Any):
+        """Observes a value."""
+        counts = self.shard[tuple(map(str, labels))]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self, values: dict) -> Iterable[tuple[str, dict, float]]:
+        """Yields cumulative bucket, count and sum samples."""
+        for labels, counts in values.items():
+            labels = dict(zip(self.labels, labels))
+            cumulative = 0
+
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield ("_bucket", {**labels, "le": str(bound)}, cumulative)
+
+            yield ("_count", labels, cumulative)
+            yield ("_sum", labels, counts[-1])
+
+
+REQUESTS = Counter(
+    "immosearch_requests_total", "Handled requests.", ("endpoint", "status")
+)
+REQUEST_DURATION = Histogram(
+    "immosearch_request_duration_seconds",
+    "Request latency.",
+    ("endpoint", "customer"),
+)
+STAGE_DURATION = Histogram(
+    "immosearch_stage_duration_seconds",
+    "Exclusive time of pipeline stages.",
+    ("stage",),
+)
+QUERIES = Counter(
+    "immosearch_db_queries_total", "Database queries of pipeline stages.", ("stage",)
+)
+ITEMS = Counter(
+    "immosearch_stage_items_total", "Items yielded by pipeline stages.", ("stage",)
+)
+FLAWED = Counter(
+    "immosearch_flawed_real_estates_total", "Real estates failing validation."
+)
+CACHE_HITS = Counter("immosearch_cache_hits_total", "Cache hits.", ("cache",))
+CACHE_MISSES = Counter("immosearch_cache_misses_total", "Cache misses.", ("cache",))
+POOL_CONNECTIONS = Gauge(
+    "immosearch_db_pool_connections",
+    "Pooled database connections.",
+    ("database", "state"),
+)
+POOL_MAX_CONNECTIONS = Gauge(
+    "immosearch_db_pool_max_connections",
+    "Maximum pooled database connections.",
+    ("database",),
+)
+POOL_EXHAUSTED = Counter(
+    "immosearch_db_pool_exhausted_total",
+    "Requests rejected for lack of a pooled database connection.",
+)
+
+
+def get_directory() -> Optional[Path]:
+    """Returns the directory to share the workers' metrics in."""
+
+    if directory := get_config().get(SECTION, "directory", fallback=None):
+        return Path(directory)
+
+    return None
+
+
+def snapshot() -> dict[str, list]:
+    """Returns the current metrics of this worker."""
+
+    for name, (hits, misses) in stats().items():
+        CACHE_HITS.set(hits, name)
+        CACHE_MISSES.set(misses, name)
+
+    for database, (in_use, idle, maximum) in pool_stats().items():
+        POOL_CONNECTIONS.set(in_use, database, "in_use")
+        POOL_CONNECTIONS.set(idle, database, "idle")
+        POOL_MAX_CONNECTIONS.set(maximum, database)
+
+    if exhausted := EXHAUSTED["total"]:
+        POOL_EXHAUSTED.set(exhausted)
+
+    return {name: metric.to_json() for name, metric in REGISTRY.items()}
+
+
+def dump(force: bool = False):
+    """Writes this worker's metrics to the shared directory
+    at most once every DUMP_INTERVAL seconds.
+    """
+
+    if (directory := get_directory()) is None:
+        return
+
+    if not force and monotonic() - LAST_DUMP[0] < DUMP_INTERVAL:
+        return
+
+    LAST_DUMP[0] = monotonic()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(dumps(snapshot()))
+    replace(tmp, path)
+
+
+def merge(total: dict, metric: Counter, values: Iterable):
+    """Merges (<labels>, <value>) pairs of a metric into the total."""
+
+    for labels, value in values:
+        labels = tuple(labels)
+
+        if isinstance(metric, Histogram):
+            counts = total.setdefault(labels, [0] * len(value))
+            total[labels] = [old + new for old, new in zip(counts, value)]
+        else:
+            total[labels] = total.get(labels, 0) + value
+
+
+def is_alive(pid: str) -> bool:
+    """Checks whether the process of the respective ID is running."""
+
+    try:
+        kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def load(path: Path) -> dict[str, list]:
+    """Returns the metrics of a file or an empty dict."""
+
+    try:
+        return loads(path.read_text())
+    except (FileNotFoundError, JSONDecodeError):
+        return {}
+
+
+def retire(directory: Path):
+    """Folds the counters and histograms of exited workers
+    into the retired totals and discards their gauges,
+    so that the collected counters never decrease.
+    """
+
+    with (directory / f"{RETIRED}.lock").open("w") as lock:
+        flock(lock, LOCK_EX)
+        dead = [
+            path
+            for path in directory.glob("*.json")
+            if path.stem != RETIRED and not is_alive(path.stem)
+        ]
+
+        if not dead:
+            return
+
+        path = directory / f"{RETIRED}.json"
+        totals = {}
+
+        for worker in (load(path), *map(load, dead)):
+            for name, values in worker.items():
+                metric = REGISTRY.get(name)
+
+                if metric is not None and not isinstance(metric, Gauge):
+                    merge(totals.setdefault(name, {}), metric, values)
+
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            dumps(
+                {
+                    name: [[list(labels), value] for labels, value in total.items()]
+                    for name, total in totals.items()
+                }
+            )
+        )
+        replace(tmp, path)
+
+        for dead_path in dead:
+            dead_path.unlink(missing_ok=True)
+
+
+def collect() -> dict[str, dict]:
+    """Returns the metrics of all workers or of this worker only,
+    if no shared directory is configured.
+
+    The gauges of exited workers are discarded,
+    while their counters and histograms are retained.
+    """
+
+    if (directory := get_directory()) is None:
+        snapshots = [snapshot()]
+    else:
+        dump(force=True)
+        retire(directory)
+        snapshots = [load(path) for path in directory.glob("*.json")]
+
+    totals = {name: {} for name in REGISTRY}
+
+    for worker in snapshots:
+        for name, values in worker.items():
+            if (metric := REGISTRY.get(name)) is not None:
+                merge(totals[name], metric, values)
+
+    return totals
+
+
+def escape(value: Any) -> str:
+    """Escapes a label value."""
+
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    """Formats labels."""
+
+    if not labels:
+        return ""
+
+    items = ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+    return f"{{{items}}}"
+
+
+def render() -> str:
+    """Renders the metrics in the Prometheus text exposition format."""
+
+    lines = []
+
+    for name, values in collect().items():
+        metric = REGISTRY[name]
+        lines.append(f"# HELP {name} {metric.description}")
+        lines.append(f"# TYPE {name} {metric.typ}")
+
+        for suffix, labels, value in metric.samples(values):
+            lines.append(f"{name}{suffix}{format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,169 @@
+"""Typed registry of the real estate options to filter and sort by."""
+
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Optional
+
+
+__all__ = [
+    "FILTER_OPTIONS",
+    "INDEX_COLUMNS",
+    "INDEXED_OPTIONS",
+    "OPTIONS",
+    "SORT_OPTIONS",
+    "Option",
+]
+
+
+class Option:
+    """A typed attribute of real estates.
+
+    Values are read from the attribute of the wrapper of a real estate,
+    i.e. from the DOM path resolved by FilterableRealEstate or from the
+    search index column read by IndexedRealEstate, so that all engines
+    share the same extractor per option.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        name: str,
+        typ: type,
+        *,
+        attribute: Optional[str] = None,
+        fallback: Optional[str] = None,
+        literal: Optional[type] = None,
+        column: Optional[str] = None,
+        nullable: bool = True,
+        indexed: bool = True,
+        filterable: bool = True,
+        sortable: bool = True,
+        cost: float = 1.0,
+    ):
+        """Declares the option's name and value type, the attribute
+        to read, which defaults to the name, an attribute to fall back
+        to if the value is falsy, the type to cast filter values to
+        instead of guessing it, the equivalent search index column,
+        whether the value may be None, whether search index records
+        suffice to evaluate it, whether it may be filtered or sorted
+        by and the relative cost of its evaluation.
+        """
+        self.name = name
+        self.typ = typ
+        self.attribute = attribute or name
+        self.fallback = fallback
+        self.literal = literal
+        self.column = column
+        self.nullable = nullable
+        self.indexed = indexed
+        self.filterable = filterable
+        self.sortable = sortable
+        self.cost = cost
+        self.extract = extractor(self.attribute, fallback)
+
+    def __repr__(self):
+        """Returns a string representation of the option."""
+        return f"{type(self).__name__}({self.name!r}, {self.typ.__name__})"
+
+
+def extractor(attribute: str, fallback: Optional[str]) -> Callable[[Any], Any]:
+    """Returns a function to read the attribute from a wrapped real estate."""
+
+    get = attrgetter(attribute)
+
+    if fallback is None:
+        return get
+
+    get_fallback = attrgetter(fallback)
+    return lambda filterable: get(filterable) or get_fallback(filterable)
+
+
+OPTIONS = {
+    option.name: option
+    for option in (
+        Option("objektart", str, column="objektart"),
+        Option("objekttyp", list, attribute="objekttypen", cost=4.0),
+        Option("land", str, column="land"),
+        Option("ort", str, column="ort"),
+        Option("ortsteil", str, column="ortsteil"),
+        Option("plz", str, column="plz"),
+        Option("strasse", str, column="strasse"),
+        Option("hausnummer", str, column="hausnummer"),
+        Option("geo", tuple, attribute="geokoordinaten", sortable=False, cost=2.0),
+        Option("distanz", float, filterable=False),
+        Option("zimmer", float, column="zimmer"),
+        Option("etage", int, column="etage"),
+        Option("etagen", int, column="etagen"),
+        Option("wohnflaeche", float, column="wohnflaeche"),
+        Option("grundstuecksflaeche", float, column="grundstuecksflaeche"),
+        Option("balkone", float, column="balkone"),
+        Option("terrassen", float, column="terrassen"),
+        Option("kaltmiete", float, fallback="nettokaltmiete"),
+        Option("warmmiete", float, fallback="gesamtmiete", cost=3.0),
+        Option("gesamtmiete", float, column="gesamtmiete", filterable=False),
+        Option("nebenkosten", float, column="nebenkosten"),
+        Option("heizkosten", float, column="heizkosten", filterable=False),
+        Option("kaufpreis", float, column="kaufpreis"),
+        Option("pacht", float, column="pacht"),
+        Option("erbpacht", float, column="erbpacht"),
+        Option("aussen_courtage", str, column="aussen_courtage"),
+        Option("innen_courtage", str, column="innen_courtage"),
+        Option(
+            "openimmo_obid",
+            str,
+            literal=str,
+            column="openimmo_obid",
+            nullable=False,
+        ),
+        Option("objektnr_intern", str, literal=str, column="objektnr_intern"),
+        Option(
+            "objektnr_extern",
+            str,
+            literal=str,
+            column="objektnr_extern",
+            nullable=False,
+        ),
+        Option("barrierefrei", bool, column="barrierefrei", nullable=False),
+        Option(
+            "rollstuhlgerecht",
+            bool,
+            column="rollstuhlgerecht",
+            nullable=False,
+            sortable=False,
+        ),
+        Option("haustiere", bool, column="haustiere", nullable=False),
+        Option("raucher", bool, column="raucher", nullable=False),
+        Option("kaufbar", bool, column="kaufbar"),
+        Option("mietbar", bool, column="mietbar"),
+        Option("erbpachtbar", bool, column="erbpachtbar"),
+        Option("leasing", bool, column="leasing"),
+        Option("verfuegbar_ab", str, column="verfuegbar_ab", sortable=False),
+        Option("abdatum", datetime, column="abdatum", cost=2.0),
+        Option("moebliert", object, indexed=False),
+        Option("seniorengerecht", bool, column="seniorengerecht", nullable=False),
+        Option("baujahr", str, literal=str, column="baujahr"),
+        Option("zustand", str, column="zustand", sortable=False),
+        Option("epart", str, column="epart"),
+        Option("energieverbrauchkennwert", str, column="energieverbrauchkennwert"),
+        Option("endenergiebedarf", str, column="endenergiebedarf"),
+        Option("primaerenergietraeger", str, column="primaerenergietraeger"),
+        Option("stromwert", str, column="stromwert"),
+        Option("waermewert", str, column="waermewert"),
+        Option("wertklasse", str, column="wertklasse"),
+        Option("min_mietdauer", str, column="min_mietdauer", cost=2.0),
+        Option("max_mietdauer", str, column="max_mietdauer", cost=2.0),
+        Option("laufzeit", float, column="laufzeit"),
+        Option("max_personen", int, column="max_personen"),
+        Option("weitergabe_generell", object, indexed=False, sortable=False),
+        Option("weitergabe_negativ", object, indexed=False, sortable=False),
+        Option("weitergabe_positiv", object, indexed=False, sortable=False),
+        Option("aktiv", bool, attribute="active", indexed=False, sortable=False),
+    )
+}
+FILTER_OPTIONS = {name: opt for name, opt in OPTIONS.items() if opt.filterable}
+SORT_OPTIONS = {name: opt for name, opt in OPTIONS.items() if opt.sortable}
+# Options, which can be evaluated on search index records alone.
+INDEXED_OPTIONS = frozenset(name for name, opt in OPTIONS.items() if opt.indexed)
+# Options, which map onto a search index column with the same semantics.
+INDEX_COLUMNS = {
+    name: opt.column for name, opt in OPTIONS.items() if opt.column is not None
+}
@@ -1,12 +1,31 @@
 """Realtor and real estate filtering."""
 
-from peewee import Model, ForeignKeyField
+from datetime import datetime
+
+from peewee import BooleanField
+from peewee import CharField
+from peewee import DateTimeField
+from peewee import FixedCharField
+from peewee import FloatField
+from peewee import ForeignKeyField
+from peewee import IntegerField
+from peewee import Model
+from peewee import TextField
 
 from mdb import Customer
+from openimmodb import Immobilie
 from peeweeplus import MySQLDatabaseProxy
 
 
-__all__ = ["Blacklist"]
+__all__ = [
+    "Blacklist",
+    "ChangeLog",
+    "Heartbeat",
+    "IndexState",
+    "RealEstateIndex",
+    "SavedSearch",
+    "SavedSearchMatch",
+]
 
 
 DATABASE = MySQLDatabaseProxy("immosearch")
@@ -26,3 +45,160 @@ class Blacklist(ImmoSearchModel):
     customer = ForeignKeyField(
         Customer, column_name="customer", related_name="immosearch", lazy_load=False
     )
+
+
+class RealEstateIndex(ImmoSearchModel):  # pylint: disable=R0903
+    """Denormalized, typed search attributes of a real estate."""
+
+    class Meta:  # pylint: disable=C0111,R0903
+        table_name = "real_estate_index"
+        indexes = (
+            (("customer", "immobilie"), True),
+            (("customer", "objektart"), False),
+            (("customer", "plz"), False),
+            (("customer", "ort"), False),
+            (("customer", "zimmer"), False),
+            (("customer", "wohnflaeche"), False),
+            (("customer", "kaltmiete"), False),
+            (("customer", "gesamtmiete"), False),
+            (("customer", "kaufpreis"), False),
+            (("customer", "breitengrad", "laengengrad"), False),
+        )
+
+    immobilie = ForeignKeyField(
+        Immobilie, column_name="immobilie", on_delete="CASCADE", lazy_load=False
+    )
+    customer = ForeignKeyField(
+        Customer, column_name="customer", on_delete="CASCADE", lazy_load=False
+    )
+    fingerprint = FixedCharField(64)
+    indexed = DateTimeField(default=datetime.now)
+    objektart = CharField(32, null=True)
+    objekttypen = TextField(null=True)
+    land = CharField(3, null=True)
+    ort = CharField(255, null=True)
+    ortsteil = CharField(255, null=True)
+    plz = CharField(16, null=True)
+    strasse = CharField(255, null=True)
+    hausnummer = CharField(32, null=True)
+    breitengrad = FloatField(null=True)
+    laengengrad = FloatField(null=True)
+    zimmer = FloatField(null=True)
+    etage = IntegerField(null=True)
+    etagen = IntegerField(null=True)
+    wohnflaeche = FloatField(null=True)
+    grundstuecksflaeche = FloatField(null=True)
+    balkone = FloatField(null=True)
+    terrassen = FloatField(null=True)
+    kaltmiete = FloatField(null=True)
+    nettokaltmiete = FloatField(null=True)
+    warmmiete = FloatField(null=True)
+    gesamtmiete = FloatField(null=True)
+    nebenkosten = FloatField(null=True)
+    heizkosten = FloatField(null=True)
+    kaufpreis = FloatField(null=True)
+    pacht = FloatField(null=True)
+    erbpacht = FloatField(null=True)
+    aussen_courtage = CharField(255, null=True)
+    innen_courtage = CharField(255, null=True)
+    openimmo_obid = CharField(255, null=True)
+    objektnr_intern = CharField(255, null=True)
+    objektnr_extern = CharField(255, null=True)
+    barrierefrei = BooleanField(null=True)
+    rollstuhlgerecht = BooleanField(null=True)
+    haustiere = BooleanField(null=True)
+    raucher = BooleanField(null=True)
+    kaufbar = BooleanField(null=True)
+    mietbar = BooleanField(null=True)
+    erbpachtbar = BooleanField(null=True)
+    leasing = BooleanField(null=True)
+    verfuegbar_ab = CharField(255, null=True)
+    abdatum = DateTimeField(null=True)
+    seniorengerecht = BooleanField(null=True)
+    baujahr = CharField(32, null=True)
+    zustand = CharField(64, null=True)
+    epart = CharField(32, null=True)
+    energieverbrauchkennwert = CharField(32, null=True)
+    endenergiebedarf = CharField(32, null=True)
+    primaerenergietraeger = CharField(64, null=True)
+    stromwert = CharField(32, null=True)
+    waermewert = CharField(32, null=True)
+    wertklasse = CharField(32, null=True)
+    min_mietdauer = CharField(64, null=True)
+    max_mietdauer = CharField(64, null=True)
+    laufzeit = FloatField(null=True)
+    max_personen = IntegerField(null=True)
+
+
+class IndexState(ImmoSearchModel):  # pylint: disable=R0903
+    """Marker of the real estate records a customer's index was built from."""
+
+    class Meta:  # pylint: disable=C0111,R0903
+        table_name = "index_state"
+
+    customer = ForeignKeyField(
+        Customer,
+        column_name="customer",
+        primary_key=True,
+        on_delete="CASCADE",
+        lazy_load=False,
+    )
+    marker = FixedCharField(64)
+    indexed = DateTimeField(default=datetime.now)
+
+
+class ChangeLog(ImmoSearchModel):  # pylint: disable=R0903
+    """Log of added, modified and removed real estates."""
+
+    class Meta:  # pylint: disable=C0111,R0903
+        table_name = "change_log"
+        indexes = ((("customer", "id"), False),)
+
+    customer = ForeignKeyField(
+        Customer, column_name="customer", on_delete="CASCADE", lazy_load=False
+    )
+    immobilie = IntegerField()  # No foreign key to keep removed real estates.
+    objektnr_extern = CharField(255, null=True)
+    action = CharField(8)
+    timestamp = DateTimeField(default=datetime.now)
+
+
+class SavedSearch(ImmoSearchModel):  # pylint: disable=R0903
+    """A customer's stored filter expression.
+
+    Only the SHA-256 digest of the secret, which
+    authorizes access to the saved search, is stored.
+    """
+
+    class Meta:  # pylint: disable=C0111,R0903
+        table_name = "saved_search"
+
+    customer = ForeignKeyField(
+        Customer, column_name="customer", on_delete="CASCADE", lazy_load=False
+    )
+    filters = TextField()
+    secret = FixedCharField(64)
+    created = DateTimeField(default=datetime.now)
+
+
+class SavedSearchMatch(ImmoSearchModel):  # pylint: disable=R0903
+    """A real estate, which matched a saved search when it changed."""
+
+    class Meta:  # pylint: disable=C0111,R0903
+        table_name = "saved_search_match"
+        indexes = (
+            (("saved_search", "immobilie"), True),
+            (("saved_search", "id"), False),
+        )
+
+    saved_search = ForeignKeyField(
+        SavedSearch, column_name="saved_search", on_delete="CASCADE", lazy_load=False
+    )
+    immobilie = IntegerField()  # No foreign key to outlive removed real estates.
+    timestamp = DateTimeField(default=datetime.now)
+
+
+class Heartbeat(ImmoSearchModel):  # pylint: disable=R0903
+    """Timestamp written to the primary to measure the lag of replicas."""
+
+    timestamp = DateTimeField(default=datetime.now)
@@ -30,5 +30,8 @@ class Pager:  # pylint: disable=R0903
         end = (self.page + 1) * self.limit - 1
 
         for i, item in enumerate(self.items):
-            if start <= i <= end:
+            if i > end:
+                break
+
+            if start <= i:
                 yield item
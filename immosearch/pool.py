@@ -0,0 +1,147 @@
+"""Pooling of database connections."""
+
+from collections import Counter
+from logging import getLogger
+from typing import Iterable
+
+from peewee import Database
+from peewee import DatabaseProxy
+from peewee import MySQLDatabase
+from peewee import PostgresqlDatabase
+from peewee import SqliteDatabase
+from playhouse.pool import MaxConnectionsExceeded
+from playhouse.pool import PooledDatabase
+from playhouse.pool import PooledMySQLDatabase
+from playhouse.pool import PooledPostgresqlDatabase
+from playhouse.pool import PooledSqliteDatabase
+
+from immosearch.config import get_config
+from immosearch.errors import HandlersExhausted
+
+
+__all__ = [
+    "MaxConnectionsExceeded",
+    "exhausted",
+    "install",
+    "pooled",
+    "release",
+    "stats",
+]
+
+
+LOGGER = getLogger("immosearch.pool")
+SECTION = "pool"
+MAX_CONNECTIONS = 8  # per worker and database
+STALE_TIMEOUT = 300  # seconds
+TIMEOUT = 5  # seconds to wait for a connection
+POOLED = (
+    (MySQLDatabase, PooledMySQLDatabase),
+    (PostgresqlDatabase, PooledPostgresqlDatabase),
+    (SqliteDatabase, PooledSqliteDatabase),
+)
+POOLS = []
+EXHAUSTED = Counter()
+
+
+def pooled(
+    database: Database,
+    max_connections: int = MAX_CONNECTIONS,
+    stale_timeout: int = STALE_TIMEOUT,
+    timeout: int = TIMEOUT,
+) -> PooledDatabase:
+    """Returns a pool of connections to the database.
+
+    Connections are recycled once they are older than the stale timeout.
+    If all connections are in use, connecting waits for the timeout
+    before raising MaxConnectionsExceeded.
+    """
+
+    if isinstance(database, PooledDatabase):
+        return database
+
+    for typ, pool in POOLED:
+        if isinstance(database, typ):
+            return pool(
+                database.database,
+                max_connections=max_connections,
+                stale_timeout=stale_timeout,
+                timeout=timeout,
+                **database.connect_params,
+            )
+
+    raise TypeError(f"Cannot pool connections of {type(database).__name__}.")
+
+
+def install(proxies: Iterable[DatabaseProxy]) -> list[PooledDatabase]:
+    """Initializes the database proxies with pools of connections
+    to their respective databases, if pooling is configured.
+    """
+
+    if not (config := get_config()).has_section(SECTION):
+        return POOLS
+
+    settings = {
+        "max_connections": config.getint(
+            SECTION, "max_connections", fallback=MAX_CONNECTIONS
+        ),
+        "stale_timeout": config.getint(
+            SECTION, "stale_timeout", fallback=STALE_TIMEOUT
+        ),
+        "timeout": config.getint(SECTION, "timeout", fallback=TIMEOUT),
+    }
+
+    for proxy in {id(proxy): proxy for proxy in proxies}.values():
+        if (database := proxy.obj) is None:
+            LOGGER.warning("Cannot pool uninitialized database proxy %s.", proxy)
+            continue
+
+        if isinstance(database, PooledDatabase):
+            continue
+
+        database.close()
+        proxy.initialize(pool := pooled(database, **settings))
+        POOLS.append(pool)
+
+    return POOLS
+
+
+def release():
+    """Returns the connections of the current thread to their pools."""
+
+    for pool in POOLS:
+        if not pool.is_closed():
+            pool.close()
+
+
+def exhausted() -> HandlersExhausted:
+    """Counts and returns the error of a pool running out of connections."""
+
+    EXHAUSTED["total"] += 1
+    return HandlersExhausted(
+        max(
+            (pool._max_connections for pool in POOLS),  # pylint: disable=W0212
+            default=MAX_CONNECTIONS,
+        )
+    )
+
+
+def get_name(pool: PooledDatabase) -> str:
+    """Returns the name of the pool's database, qualified by its host."""
+
+    if host := pool.connect_params.get("host"):
+        return f"{host}/{pool.database}"
+
+    return pool.database
+
+
+def stats() -> dict[str, tuple[int, int, int]]:
+    """Returns (<in use>, <idle>, <max>) connections by database."""
+
+    return {
+        get_name(pool): (
+            len(pool._in_use),  # pylint: disable=W0212
+            len(pool._connections),  # pylint: disable=W0212
+            pool._max_connections,  # pylint: disable=W0212
+        )
+        for pool in POOLS
+    }
@@ -0,0 +1,218 @@
+"""Opt-in profiling of sampled and slow requests."""
+
+from collections import Counter
+from cProfile import Profile
+from hashlib import sha1
+from pathlib import Path
+from random import random
+from sys import _current_frames
+from threading import Lock, Thread, get_ident
+from time import perf_counter, sleep, strftime
+from typing import Optional
+
+from immosearch.config import get_config
+from immosearch.snapshot import normalize
+
+
+__all__ = ["RequestProfile", "start", "finish"]
+
+
+SECTION = "profiling"
+DIRECTORY = "/var/tmp/immosearch/profiles"
+MAX_PROFILES = 100
+INTERVAL = 0.005  # seconds
+# Deterministic profilers cannot run concurrently, e.g. on sys.monitoring.
+PROFILING = Lock()
+
+
+class Sampler(Thread):
+    """Samples the stacks of registered threads in collapsed stack format.
+
+    Threads are only sampled once they have been registered for longer
+    than the delay, so that the stacks of fast requests are never walked.
+    """
+
+    def __init__(self, interval: float = INTERVAL, delay: float = 0.0):
+        """Sets the sampling interval and the delay in seconds."""
+        super().__init__(name="immosearch-sampler", daemon=True)
+        self.interval = interval
+        self.delay = delay
+        self.samples = {}
+        self.lock = Lock()
+
+    def register(self, thread: int):
+        """Starts sampling the thread after the delay."""
+        with self.lock:
+            self.samples[thread] = (perf_counter() + self.delay, Counter())
+
+    def unregister(self, thread: int) -> Counter:
+        """Stops sampling the thread and returns its samples."""
+        with self.lock:
+            _, samples = self.samples.pop(thread, (None, Counter()))
+            return samples
+
+    def run(self):
+        """Samples the stacks of the threads, which are due."""
+        while True:
+            sleep(self.interval)
+            now = perf_counter()
+
+            with self.lock:
+                due = [
+                    (thread, samples)
+                    for thread, (start, samples) in self.samples.items()
+                    if start <= now
+                ]
+
+                if not due:
+                    continue
+
+                frames = _current_frames()
+
+                for thread, samples in due:
+                    if (frame := frames.get(thread)) is not None:
+                        samples[collapse(frame)] += 1
+
+
+def collapse(frame) -> str:
+    """Returns the stack of a frame in collapsed format."""
+
+    stack = []
+
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+
+    return ";".join(reversed(stack))
+
+
+class RequestProfile:
+    """Profiling state of a request."""
+
+    def __init__(self, profile: Optional[Profile], sampler: Optional[Sampler]):
+        """Sets the deterministic profiler and the sampler."""
+        self.profile = profile
+        self.sampler = sampler
+        self.thread = get_ident()
+        self.started = perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """Returns the seconds elapsed since the start of profiling."""
+        return perf_counter() - self.started
+
+
+SAMPLER = []
+
+
+def get_sampler() -> Sampler:
+    """Returns the running sampler.
+
+    Sampling starts after the configured delay,
+    which defaults to half of the threshold.
+    """
+
+    if not SAMPLER:
+        config = get_config()
+        threshold = config.getfloat(SECTION, "threshold", fallback=0.0)
+        sampler = Sampler(
+            config.getfloat(SECTION, "interval", fallback=INTERVAL),
+            config.getfloat(SECTION, "delay", fallback=threshold / 2),
+        )
+        sampler.start()
+        SAMPLER.append(sampler)
+
+    return SAMPLER[0]
+
+
+def enable() -> Optional[Profile]:
+    """Returns an enabled deterministic profiler or None,
+    if another one is already active in this process.
+    """
+
+    if not PROFILING.acquire(blocking=False):
+        return None
+
+    profile = Profile()
+
+    try:
+        profile.enable()
+    except ValueError:  # Another tool is profiling.
+        PROFILING.release()
+        return None
+
+    return profile
+
+
+def start() -> Optional[RequestProfile]:
+    """Starts profiling the current request, if configured."""
+
+    if not (config := get_config()).has_section(SECTION):
+        return None
+
+    if random() < config.getfloat(SECTION, "fraction", fallback=0.0) and (
+        profile := enable()
+    ):
+        return RequestProfile(profile, None)
+
+    if config.getfloat(SECTION, "threshold", fallback=0.0) > 0:
+        sampler = get_sampler()
+        sampler.register(get_ident())
+        return RequestProfile(None, sampler)
+
+    return None
+
+
+def finish(
+    request_profile: Optional[RequestProfile], cid: Optional[int], query: str
+) -> Optional[Path]:
+    """Finishes profiling of the request and writes the profile,
+    if it was sampled or took longer than the threshold.
+    """
+
+    if request_profile is None:
+        return None
+
+    if (profile := request_profile.profile) is not None:
+        profile.disable()
+        PROFILING.release()
+        path = get_path(cid, query, ".pstats")
+        profile.dump_stats(path)
+    else:
+        samples = request_profile.sampler.unregister(request_profile.thread)
+        threshold = get_config().getfloat(SECTION, "threshold", fallback=0.0)
+
+        if request_profile.elapsed < threshold or not samples:
+            return None
+
+        path = get_path(cid, query, ".folded")
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in samples.items())
+        )
+
+    prune(path.parent)
+    return path
+
+
+def get_path(cid: Optional[int], query: str, suffix: str) -> Path:
+    """Returns a profile path tagged with the customer and normalized query."""
+
+    directory = Path(get_config().get(SECTION, "directory", fallback=DIRECTORY))
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = sha1(normalize(query).encode()).hexdigest()[:12]
+    return directory / f"{strftime('%Y%m%d%H%M%S')}-{cid or 'none'}-{digest}{suffix}"
+
+
+def prune(directory: Path):
+    """Removes the oldest profiles beyond the configured maximum."""
+
+    max_profiles = get_config().getint(SECTION, "max_profiles", fallback=MAX_PROFILES)
+    profiles = sorted(
+        (path for path in directory.iterdir() if path.suffix in {".pstats", ".folded"}),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+
+    for path in profiles[max_profiles:]:
+        path.unlink(missing_ok=True)
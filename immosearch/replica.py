@@ -0,0 +1,278 @@
+"""Routing of read-only requests to a read replica.
+
+The lag of the read replica is measured as the age of the last
+heartbeat, which immosearch-heartbeat writes to the primary and which
+has been replicated to the replica. Hence immosearch-heartbeat must
+keep running at an interval well below the acceptable lag. If it
+stops, the replica is considered lagging and the primary is used.
+As the replication of a server covers all of its schemas, the heartbeat
+of the immosearch schema also reflects the lag of the mdb and
+openimmodb schemas on the same server.
+"""
+
+from argparse import ArgumentParser, Namespace
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging import INFO, basicConfig, getLogger
+from time import monotonic, sleep
+from typing import Any, Iterable, Iterator, Optional
+
+from peewee import Database, DatabaseError, DatabaseProxy, InterfaceError
+from playhouse.pool import PooledDatabase
+
+from immosearch.config import get_config
+from immosearch.orm import Heartbeat
+from immosearch.pool import POOLS
+
+
+__all__ = ["READ_ONLY", "Lag", "Router", "beat", "install", "main", "read_only"]
+
+
+LOGGER = getLogger("immosearch.replica")
+SECTION = "replica"
+MAX_LAG = 30  # seconds
+CHECK_INTERVAL = 5  # seconds
+HEARTBEAT = 1  # ID of the heartbeat record
+# Connection parameters of the primary, which the replica may override.
+OVERRIDES = {"host": str, "port": int, "user": str, "passwd": str, "password": str}
+READ_ONLY = ContextVar("read_only", default=False)
+
+
+class Lag:
+    """Replication lag of a replica behind its primary.
+
+    The lag is measured at most once every check interval
+    and shared by the routers of all databases.
+    """
+
+    def __init__(
+        self,
+        replica: Database,
+        max_lag: float = MAX_LAG,
+        interval: float = CHECK_INTERVAL,
+    ):
+        """Sets the replica, the acceptable lag
+        and the interval of measurements in seconds.
+        """
+        self.replica = replica
+        self.max_lag = max_lag
+        self.interval = interval
+        self.seconds = None
+        self.checked = None
+
+    def measure(self) -> Optional[float]:
+        """Returns the age of the replicated heartbeat in seconds
+        or None if the replica or its heartbeat is unavailable.
+        """
+        try:
+            heartbeat = get_heartbeat(self.replica)
+        except (DatabaseError, InterfaceError) as error:
+            LOGGER.warning("Replica unavailable: %s", error)
+            return None
+
+        if heartbeat is None:
+            return None
+
+        return max((datetime.now() - heartbeat).total_seconds(), 0)
+
+    def acceptable(self) -> bool:
+        """Checks whether the replica is available and recent enough."""
+        if self.checked is None or monotonic() - self.checked >= self.interval:
+            self.seconds = self.measure()
+            self.checked = monotonic()
+
+            if self.seconds is None or self.seconds > self.max_lag:
+                LOGGER.warning("Falling back to primary. Lag: %s s.", self.seconds)
+
+        return self.seconds is not None and self.seconds <= self.max_lag
+
+
+class Router:
+    """A database, which forwards to the replica within
+    read-only contexts if its lag is acceptable and to
+    the primary otherwise.
+    """
+
+    def __init__(self, primary: Database, replica: Database, lag: Lag):
+        """Sets primary, replica and the lag of the replica."""
+        self.primary = primary
+        self.replica = replica
+        self.lag = lag
+        self.entered = ContextVar(f"entered-{id(self)}", default=())
+
+    @property
+    def databases(self) -> tuple[Database, Database]:
+        """Returns the databases to route to."""
+        return (self.primary, self.replica)
+
+    def __getattr__(self, attr: str) -> Any:
+        """Returns the attribute of the current database."""
+        return getattr(self.current, attr)
+
+    def __enter__(self):
+        """Enters the current database's context."""
+        database = self.current
+        self.entered.set((*self.entered.get(), database))
+        return database.__enter__()
+
+    def __exit__(self, *args):
+        """Exits the context of the database, which has been entered."""
+        *entered, database = self.entered.get()
+        self.entered.set(tuple(entered))
+        return database.__exit__(*args)
+
+    @property
+    def current(self) -> Database:
+        """Returns the database to use in the current context."""
+        if READ_ONLY.get() and self.lag.acceptable():
+            return self.replica
+
+        return self.primary
+
+
+@contextmanager
+def read_only() -> Iterator[None]:
+    """Routes queries within the context to the replicas."""
+
+    token = READ_ONLY.set(True)
+
+    try:
+        yield
+    finally:
+        READ_ONLY.reset(token)
+
+
+def get_heartbeat(database: Database) -> Optional[datetime]:
+    """Returns the last heartbeat replicated to the database."""
+
+    if (
+        heartbeat := Heartbeat.select(Heartbeat.timestamp)
+        .where(Heartbeat.id == HEARTBEAT)
+        .bind(database)
+        .first()
+    ) is None:
+        return None
+
+    return heartbeat.timestamp
+
+
+def beat():
+    """Writes a heartbeat to the primary."""
+
+    Heartbeat.replace(id=HEARTBEAT, timestamp=datetime.now()).execute()
+
+
+def get_replica_names() -> dict[str, str]:
+    """Returns the configured replicas' names by primary database name."""
+
+    names = {}
+
+    for line in get_config().get(SECTION, "databases", fallback="").splitlines():
+        if line := line.strip():
+            primary, replica = line.split()
+            names[primary] = replica
+
+    return names
+
+
+def get_overrides() -> dict[str, Any]:
+    """Returns the configured connection parameters of the replicas."""
+
+    config = get_config()
+    return {
+        key: typ(config.get(SECTION, key))
+        for key, typ in OVERRIDES.items()
+        if config.has_option(SECTION, key)
+    }
+
+
+def replicate(database: Database, name: str, overrides: dict[str, Any]) -> Database:
+    """Returns a database of the same type and pool settings as the
+    primary database, connecting to the replica with the given name
+    and connection parameters.
+    """
+
+    params = {**database.connect_params, **overrides}
+
+    if not isinstance(database, PooledDatabase):
+        return type(database)(name, **params)
+
+    # pylint: disable=W0212
+    replica = type(database)(
+        name,
+        max_connections=database._max_connections,
+        stale_timeout=database._stale_timeout,
+        timeout=database._wait_timeout,
+        **params,
+    )
+    POOLS.append(replica)
+    return replica
+
+
+def install(proxies: Iterable[DatabaseProxy]) -> list[Router]:
+    """Initializes the database proxies with routers
+    to their replicas, if replicas are configured.
+
+    The first proxy must hold the heartbeat table.
+    """
+
+    if not (config := get_config()).has_section(SECTION):
+        return []
+
+    names = get_replica_names()
+    overrides = get_overrides()
+    routers = []
+    lag = None
+
+    for proxy in {id(proxy): proxy for proxy in proxies}.values():
+        if (database := proxy.obj) is None or isinstance(database, Router):
+            continue
+
+        name = names.get(database.database, database.database)
+
+        if name == database.database and not overrides:
+            LOGGER.warning("No replica configured for %s.", database.database)
+            continue
+
+        replica = replicate(database, name, overrides)
+
+        if lag is None:
+            lag = Lag(
+                replica,
+                max_lag=config.getfloat(SECTION, "max_lag", fallback=MAX_LAG),
+                interval=config.getfloat(
+                    SECTION, "check_interval", fallback=CHECK_INTERVAL
+                ),
+            )
+
+        proxy.initialize(router := Router(database, replica, lag))
+        routers.append(router)
+
+    return routers
+
+
+def get_args() -> Namespace:
+    """Returns the parsed command line arguments."""
+
+    parser = ArgumentParser(description="Write heartbeats to measure replica lag.")
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        metavar="seconds",
+        help="keep writing heartbeats at this interval",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Writes one or, given an interval, continuous heartbeats."""
+
+    basicConfig(level=INFO)
+    args = get_args()
+    beat()
+
+    while args.interval:
+        sleep(args.interval)
+        beat()
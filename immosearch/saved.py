@@ -0,0 +1,182 @@
+"""Saved searches, matched against changed real estates."""
+
+from hashlib import sha256
+from hmac import compare_digest
+from logging import getLogger
+from secrets import token_urlsafe
+from typing import Iterable, NamedTuple, Optional
+
+from mdb import Customer
+
+from immosearch.config import get_config
+from immosearch.errors import InvalidParameterError, RenderableError
+from immosearch.expression import Statistics
+from immosearch.filter import FilterableRealEstate, parse_filters
+from immosearch.lib import BATCH_SIZE
+from immosearch.orm import SavedSearch, SavedSearchMatch
+
+
+__all__ = [
+    "Matcher",
+    "NewMatches",
+    "create",
+    "get_new_matches",
+    "is_authorized",
+    "may_create",
+]
+
+
+LOGGER = getLogger("immosearch.saved")
+SECTION = "saved_searches"
+
+
+class NewMatches(NamedTuple):
+    """Real estates newly matching a saved search since a token."""
+
+    idents: list[int]
+    token: int
+
+
+class Matcher:
+    """Reverse-matches changed real estates against
+    the saved searches of a customer.
+
+    Instead of running every saved search against all real estates,
+    each changed real estate is evaluated against the compiled filters
+    of the saved searches once, while it is being synchronized.
+    """
+
+    def __init__(self, customer: Customer):
+        """Loads and compiles the customer's saved searches."""
+        self.searches = []
+        self.statistics = Statistics()
+        self.matched = []
+        self.unmatched = {}
+
+        for saved_search in SavedSearch.select().where(
+            SavedSearch.customer == customer
+        ):
+            try:
+                expression = parse_filters(saved_search.filters)
+            except RenderableError:
+                LOGGER.warning("Invalid saved search: %i", saved_search.id)
+                continue
+
+            self.searches.append((saved_search.id, expression))
+
+    def match(self, ident: int, dom):
+        """Evaluates a changed real estate against the saved searches."""
+        if not self.searches:
+            return
+
+        filterable = FilterableRealEstate(dom)
+
+        for saved_search, expression in self.searches:
+            try:
+                matches = expression.evaluate(filterable.apply, self.statistics)
+            except RenderableError:
+                matches = False
+
+            if matches:
+                self.matched.append({"saved_search": saved_search, "immobilie": ident})
+            else:
+                self.unmatched.setdefault(saved_search, []).append(ident)
+
+    def remove(self, idents: Iterable[int]):
+        """Discards the matches of removed real estates."""
+        if not self.searches:
+            return
+
+        idents = list(idents)
+
+        for saved_search, _ in self.searches:
+            self.unmatched.setdefault(saved_search, []).extend(idents)
+
+    def save(self):
+        """Stores the new matches and discards the
+        matches of real estates, which no longer match.
+
+        Real estates, which already matched, keep their match,
+        so that only real estates, which start to match,
+        are reported as new.
+        """
+        for saved_search, idents in self.unmatched.items():
+            for offset in range(0, len(idents), BATCH_SIZE):
+                batch = idents[offset : offset + BATCH_SIZE]
+                SavedSearchMatch.delete().where(
+                    (SavedSearchMatch.saved_search == saved_search)
+                    & (SavedSearchMatch.immobilie << batch)
+                ).execute()
+
+        for offset in range(0, len(self.matched), BATCH_SIZE):
+            SavedSearchMatch.insert_many(
+                self.matched[offset : offset + BATCH_SIZE]
+            ).on_conflict_ignore().execute()
+
+        self.matched.clear()
+        self.unmatched.clear()
+
+
+def digest(secret: str) -> str:
+    """Returns the hex digest of a secret."""
+
+    return sha256(secret.encode()).hexdigest()
+
+
+def create(customer: Customer, filters: str) -> tuple[SavedSearch, str]:
+    """Validates the filters and saves the search.
+    Returns the saved search and its secret.
+    """
+
+    parse_filters(filters)
+    secret = token_urlsafe(32)
+    saved_search = SavedSearch.create(
+        customer=customer, filters=filters, secret=digest(secret)
+    )
+    return (saved_search, secret)
+
+
+def is_authorized(saved_search: SavedSearch, secret: Optional[str]) -> bool:
+    """Checks whether the secret authorizes access to the saved search."""
+
+    if not secret:
+        return False
+
+    return compare_digest(digest(secret), saved_search.secret)
+
+
+def may_create(key: Optional[str]) -> bool:
+    """Checks the key against the configured key to create saved searches.
+    Without a configured key, anyone may create saved searches.
+    """
+
+    if (expected := get_config().get(SECTION, "key", fallback=None)) is None:
+        return True
+
+    return bool(key) and compare_digest(key.encode(), expected.encode())
+
+
+def get_new_matches(saved_search: SavedSearch, token: Optional[str]) -> NewMatches:
+    """Returns the real estates which started to
+    match the saved search since the token.
+    """
+
+    query = SavedSearchMatch.select(
+        SavedSearchMatch.id, SavedSearchMatch.immobilie
+    ).where(SavedSearchMatch.saved_search == saved_search)
+    last_id = 0
+
+    if token:
+        try:
+            last_id = int(token)
+        except ValueError:
+            raise InvalidParameterError(f"since={token}") from None
+
+        query = query.where(SavedSearchMatch.id > last_id)
+
+    idents = []
+
+    for last_id, immobilie in query.order_by(SavedSearchMatch.id).tuples().iterator():
+        idents.append(immobilie)
+
+    return NewMatches(idents, last_id)
@@ -4,10 +4,12 @@ from enum import Enum
 from re import compile as compile_
 from typing import Iterable, Iterator
 
-from openimmo import anhaenge
 from openimmodb import Anhang
 
 from .errors import InvalidAttachmentLimit
+from .lib import lazy_import
+
+openimmo = lazy_import("openimmo")
 
 
 __all__ = ["Selections", "RealEstateDataSelector"]
@@ -110,7 +112,7 @@ class RealEstateDataSelector:
 
         for orm, dom in self.real_estates:
             # Discard previously cached attachments.
-            dom.anhaenge = anhaenge()
+            dom.anhaenge = openimmo.anhaenge()
 
             if allatts:
                 set_all_attachments(orm.id, dom)
@@ -0,0 +1,223 @@
+"""Precomputed response snapshots of frequent queries.
+
+Each rendering of a snapshot is written into a directory named after
+its change token. A symlink, which is replaced atomically, points to
+the current rendering, so that its plain and compressed variants are
+always served from the same rendering.
+"""
+
+from functools import cache
+from hashlib import sha1
+from logging import INFO, basicConfig, getLogger
+from os import replace, symlink
+from pathlib import Path
+from shutil import rmtree
+from time import sleep
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from peewee import fn
+
+from immosearch.compression import SUFFIXES, ENCODINGS, compress
+from immosearch.config import get_config
+from immosearch.orm import Blacklist, ChangeLog
+
+
+__all__ = ["Snapshot", "compressed_path", "get_snapshots", "lookup", "main"]
+
+
+LOGGER = getLogger("immosearch.snapshot")
+SECTION = "snapshots"
+DIRECTORY = "/var/cache/immosearch/snapshots"
+INTERVAL = 60  # seconds
+IGNORED_ARGS = {"nocache"}
+FILENAME = "snapshot.xml"
+
+
+def normalize(query: str) -> str:
+    """Returns a normalized query string."""
+
+    return urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+            if key not in IGNORED_ARGS
+        )
+    )
+
+
+class Snapshot(NamedTuple):
+    """A customer ID and query string to keep a response for."""
+
+    cid: int
+    query: str
+
+    @classmethod
+    def fromline(cls, line: str):
+        """Creates a snapshot from a "<cid> [<query>]" line."""
+        cid, *query = line.split(maxsplit=1)
+        return cls(int(cid), normalize("".join(query)))
+
+    @property
+    def url(self) -> str:
+        """Returns the URL path to render the snapshot from."""
+        return f"/customer/{self.cid}?{self.query}&nocache"
+
+    @property
+    def link(self) -> Path:
+        """Returns the path of the symlink to the current rendering."""
+        digest = sha1(self.query.encode()).hexdigest()
+        return get_directory() / f"{self.cid}-{digest}"
+
+    @property
+    def path(self) -> Optional[Path]:
+        """Returns the path of the current rendering's plain file or None."""
+        try:
+            return self.link.parent / self.link.readlink() / FILENAME
+        except FileNotFoundError:
+            return None
+
+    @property
+    def token(self) -> Optional[int]:
+        """Returns the change token the snapshot was rendered at."""
+        try:
+            return int(self.link.readlink().suffix[1:])
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def renderings(self) -> list[Path]:
+        """Returns the directories of the snapshot's renderings."""
+        return list(self.link.parent.glob(f"{self.link.name}.*[0-9]"))
+
+    def write(self, data: bytes, token: int):
+        """Writes the snapshot data and its precompressed variants
+        into a new rendering and atomically makes it the current one.
+        The previous rendering is kept for readers, which are still
+        sending it, while older ones are removed.
+        """
+        previous = self.path
+        directory = self.link.with_name(f"{self.link.name}.{token}")
+        rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        (directory / FILENAME).write_bytes(data)
+
+        for encoding in ENCODINGS:
+            compressed_path(directory / FILENAME, encoding).write_bytes(
+                compress(data, encoding)
+            )
+
+        tmp = self.link.with_name(f"{self.link.name}.tmp")
+        tmp.unlink(missing_ok=True)
+        symlink(directory.name, tmp)
+        replace(tmp, self.link)
+
+        for rendering in self.renderings():
+            if rendering != directory and (
+                previous is None or rendering != previous.parent
+            ):
+                rmtree(rendering, ignore_errors=True)
+
+    def remove(self):
+        """Removes the snapshot's symlink and renderings."""
+        self.link.unlink(missing_ok=True)
+
+        for rendering in self.renderings():
+            rmtree(rendering, ignore_errors=True)
+
+
+def compressed_path(path: Path, encoding: str) -> Path:
+    """Returns the path of the compressed variant of a file."""
+
+    return path.with_name(path.name + SUFFIXES[encoding])
+
+
+def get_directory() -> Path:
+    """Returns the snapshot directory."""
+
+    return Path(get_config().get(SECTION, "directory", fallback=DIRECTORY))
+
+
+@cache
+def get_snapshots() -> frozenset[Snapshot]:
+    """Returns the configured snapshots."""
+
+    return frozenset(
+        Snapshot.fromline(line)
+        for line in get_config().get(SECTION, "queries", fallback="").splitlines()
+        if line.strip()
+    )
+
+
+def lookup(cid: int, query: str) -> Optional[Path]:
+    """Returns the path of the plain file of the current
+    rendering of the respective request's snapshot or None.
+    """
+
+    if not get_config().has_section(SECTION):
+        return None
+
+    if any(key in IGNORED_ARGS for key, _ in parse_qsl(query, True)):
+        return None
+
+    snapshot = Snapshot(cid, normalize(query))
+
+    if snapshot not in get_snapshots():
+        return None
+
+    if (path := snapshot.path) is not None and path.is_file():
+        return path
+
+    return None
+
+
+def get_token(cid: int) -> int:
+    """Returns the latest change token of the customer."""
+
+    return (
+        ChangeLog.select(fn.MAX(ChangeLog.id))
+        .where(ChangeLog.customer == cid)
+        .scalar()
+        or 0
+    )
+
+
+def materialize(application, snapshot: Snapshot) -> bool:
+    """Renders the snapshot, if the customer's real estates changed.
+    Snapshots of blacklisted customers are removed.
+    Returns True iff the snapshot was (re-)rendered.
+    """
+
+    if Blacklist.select().where(Blacklist.customer == snapshot.cid).exists():
+        snapshot.remove()
+        return False
+
+    if (token := get_token(snapshot.cid)) == snapshot.token:
+        return False
+
+    with application.test_client() as client:
+        response = client.get(snapshot.url)
+
+    if response.status_code != 200:
+        LOGGER.error("Could not render %s: %s", snapshot, response.status)
+        snapshot.remove()
+        return False
+
+    snapshot.write(response.get_data(), token)
+    return True
+
+
+def main():
+    """Keeps the configured snapshots up to date."""
+
+    from immosearch.wsgi import APPLICATION  # pylint: disable=C0415
+
+    basicConfig(level=INFO)
+    get_directory().mkdir(parents=True, exist_ok=True)
+    interval = get_config().getint(SECTION, "interval", fallback=INTERVAL)
+
+    while True:
+        for snapshot in get_snapshots():
+            if materialize(APPLICATION, snapshot):
+                LOGGER.info("Rendered snapshot %s.", snapshot)
+
+        sleep(interval)
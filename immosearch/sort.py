@@ -1,68 +1,26 @@
 """Real estate sorting."""
 
 from enum import Enum
+from heapq import nsmallest
 from operator import itemgetter
-from typing import Any
+from typing import Any, Optional
 
 from immosearch.filter import FilterableRealEstate
 from immosearch.errors import InvalidSortingOption
+from immosearch.lib import lazy_import
+from immosearch.options import SORT_OPTIONS, Option
+
+try:
+    numpy = lazy_import("numpy")
+except ImportError:
+    numpy = None
 
 
 __all__ = ["Sorting", "RealEstateSorter"]
 
 
-OPTIONS = {
-    "objektart": lambda f: f.objektart,
-    "objekttyp": lambda f: f.objekttypen,
-    "land": lambda f: f.land,
-    "ort": lambda f: f.ort,
-    "ortsteil": lambda f: f.ortsteil,
-    "plz": lambda f: f.plz,
-    "strasse": lambda f: f.strasse,
-    "hausnummer": lambda f: f.hausnummer,
-    "zimmer": lambda f: f.zimmer,
-    "etage": lambda f: f.etage,
-    "etagen": lambda f: f.etagen,
-    "wohnflaeche": lambda f: f.wohnflaeche,
-    "grundstuecksflaeche": lambda f: f.grundstuecksflaeche,
-    "balkone": lambda f: f.balkone,
-    "terrassen": lambda f: f.terrassen,
-    "kaltmiete": lambda f: f.kaltmiete or f.nettokaltmiete,
-    "warmmiete": lambda f: f.warmmiete,
-    "gesamtmiete": lambda f: f.gesamtmiete,
-    "nebenkosten": lambda f: f.nebenkosten,
-    "heizkosten": lambda f: f.heizkosten,
-    "kaufpreis": lambda f: f.kaufpreis,
-    "pacht": lambda f: f.pacht,
-    "erbpacht": lambda f: f.erbpacht,
-    "aussen_courtage": lambda f: f.aussen_courtage,
-    "innen_courtage": lambda f: f.innen_courtage,
-    "openimmo_obid": (str, lambda f: f.openimmo_obid),
-    "objektnr_intern": (str, lambda f: f.objektnr_intern),
-    "objektnr_extern": (str, lambda f: f.objektnr_extern),
-    "barrierefrei": lambda f: f.barrierefrei,
-    "haustiere": lambda f: f.haustiere,
-    "raucher": lambda f: f.raucher,
-    "kaufbar": lambda f: f.kaufbar,
-    "mietbar": lambda f: f.mietbar,
-    "erbpachtbar": lambda f: f.erbpachtbar,
-    "leasing": lambda f: f.leasing,
-    "abdatum": lambda f: f.abdatum,
-    "moebliert": lambda f: f.moebliert,
-    "seniorengerecht": lambda f: f.seniorengerecht,
-    "baujahr": (str, lambda f: f.baujahr),
-    "epart": lambda f: f.epart,
-    "energieverbrauchkennwert": lambda f: f.energieverbrauchkennwert,
-    "endenergiebedarf": lambda f: f.endenergiebedarf,
-    "primaerenergietraeger": lambda f: f.primaerenergietraeger,
-    "stromwert": lambda f: f.stromwert,
-    "waermewert": lambda f: f.waermewert,
-    "wertklasse": lambda f: f.wertklasse,
-    "min_mietdauer": lambda f: f.min_mietdauer,
-    "max_mietdauer": lambda f: f.max_mietdauer,
-    "laufzeit": lambda f: f.laufzeit,
-    "max_personen": lambda f: f.max_personen,
-}
+NUMERIC = (int, float)  # Including bool.
+NUMERIC_TYPES = {bool, int, float}
 
 
 class Key:
@@ -126,32 +84,157 @@ class RealEstateSorter:
     of a realtor by certain attributes.
     """
 
-    def __init__(self, real_estates, sort_options):
+    def __init__(
+        self,
+        real_estates,
+        sort_options,
+        origin: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        filterable: type = FilterableRealEstate,
+    ):
         """Sets the respective realtor and filter tuples like:
-        (<option>, <operation>, <target_value>).
+        (<option>, <operation>, <target_value>), an optional
+        origin to sort by distance from, an optional limit
+        of the amount of real estates to keep and the class
+        to wrap the real estates for key extraction.
         """
         self.real_estates = real_estates
         self.sort_options = sort_options or []
+        self.origin = origin
+        self.limit = limit
+        self.filterable = filterable
 
     def __iter__(self):
         """Sort real estates by the given options."""
-        for _, real_estate in sorted(self.keyed, key=itemgetter(0)):
+        for _, real_estate in self.sorted:
             yield real_estate
 
     @property
-    def keyed(self):
-        """Generates (<keys>, <real_estate>) tuples."""
+    def sorted(self):
+        """Returns sorted (<keys>, <real_estate>) tuples.
+
+        With numpy, the rows are ordered by their raw values and
+        only the returned rows are wrapped into keys.
+        """
+        rows = self.rows
+
+        if numpy is not None:
+            rows = list(rows)
+
+            if (order := argsort(rows, self.sort_options)) is not None:
+                return [self.key(rows[index]) for index in order[: self.limit]]
+
+        keyed = map(self.key, rows)
+
+        if self.limit is None:
+            return sorted(keyed, key=itemgetter(0))
+
+        return nsmallest(self.limit, keyed, key=itemgetter(0))
+
+    @property
+    def rows(self):
+        """Generates (<values>, <real_estate>) tuples."""
+        extractors = [get_option(option).extract for option, _ in self.sort_options]
+
         for orm, dom in self.real_estates:
-            f_re = FilterableRealEstate(dom)
-            keys = []
+            f_re = self.filterable(dom, origin=self.origin)
+            yield ([extract(f_re) for extract in extractors], (orm, dom))
+
+    def key(self, row: tuple) -> tuple:
+        """Returns a (<keys>, <real_estate>) tuple of the row.
+        Ties are broken by the real estate's ID.
+        """
+        values, real_estate = row
+        keys = [
+            Key(value, desc=desc) for value, (_, desc) in zip(values, self.sort_options)
+        ]
+        keys.append(get_ident(real_estate))
+        return (keys, real_estate)
+
 
-            for sort_option in self.sort_options:
-                option, desc = sort_option
-                option_func = OPTIONS.get(option)
+def get_ident(real_estate: tuple) -> int:
+    """Returns the real estate's ID of an (<orm>, <dom>) tuple."""
 
-                if option_func is None:
-                    raise InvalidSortingOption(option)
+    orm, _ = real_estate
+    # Index records reference the real estate.
+    return getattr(orm, "immobilie_id", orm.id)
 
-                keys.append(Key(option_func(f_re), desc=desc))
 
-            yield (keys, (orm, dom))
+def get_option(option: str) -> Option:
+    """Returns the respective sortable option."""
+
+    try:
+        return SORT_OPTIONS[option]
+    except KeyError:
+        raise InvalidSortingOption(option) from None
+
+
+def argsort(rows: list, sort_options) -> Optional[Any]:
+    """Returns the indices of the rows in sorted order
+    or None, if a sort key cannot be vectorized.
+    Ties are broken by the real estates' IDs.
+    """
+
+    arrays = [numpy.array([get_ident(real_estate) for _, real_estate in rows])]
+
+    # numpy.lexsort() sorts by the last array first.
+    for column, (option, desc) in reversed(list(enumerate(sort_options))):
+        values = [row_values[column] for row_values, _ in rows]
+
+        if (column_arrays := sort_arrays(values, desc, get_option(option))) is None:
+            return None
+
+        arrays.extend(column_arrays)
+
+    return numpy.lexsort(arrays)
+
+
+def sort_arrays(values: list, desc: bool, option: Option) -> Optional[tuple]:
+    """Returns the arrays to sort the values by, least significant first,
+    so that None is the smallest value like with Key, i.e. comes first
+    when sorting ascending and last when sorting descending.
+
+    Values of options declared as numeric or as string are not
+    inspected for their type. Values of non-nullable numeric
+    options skip the missing-value array, unless they contain None.
+    """
+
+    if (
+        not option.nullable
+        and option.typ in NUMERIC_TYPES
+        and not any(value is None for value in values)
+    ):
+        keys = numpy.array(values, dtype=numpy.float64)
+        return (-keys,) if desc else (keys,)
+
+    missing = numpy.array([value is None for value in values], dtype=bool)
+
+    if option.typ in NUMERIC_TYPES:
+        numeric = True
+    elif option.typ is str:
+        numeric = False
+    else:
+        present = [value for value in values if value is not None]
+
+        if all(isinstance(value, NUMERIC) for value in present):
+            numeric = True
+        elif all(isinstance(value, str) for value in present):
+            numeric = False
+        else:
+            return None
+
+    if numeric:
+        keys = numpy.array(
+            [0 if value is None else value for value in values], dtype=numpy.float64
+        )
+    else:
+        _, keys = numpy.unique(
+            numpy.array(["" if value is None else value for value in values]),
+            return_inverse=True,
+        )
+        keys = keys.reshape(-1)
+
+    if desc:
+        return (-keys, missing)
+
+    return (keys, ~missing)
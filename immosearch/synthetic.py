@@ -0,0 +1,223 @@
+"""Synthetic OpenImmo™ portfolios and local database stand-ins."""
+
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from random import Random
+from types import SimpleNamespace
+from typing import Any, Iterable, Iterator, Optional
+from uuid import UUID
+
+from peewee import ForeignKeyField, Model, SqliteDatabase
+
+from openimmo import aktion
+from openimmo import flaechen
+from openimmo import freitexte
+from openimmo import geo
+from openimmo import geokoordinaten
+from openimmo import haus
+from openimmo import immobilie
+from openimmo import kontaktperson
+from openimmo import land
+from openimmo import nutzungsart
+from openimmo import objektart
+from openimmo import objektkategorie
+from openimmo import preise
+from openimmo import verwaltung_objekt
+from openimmo import verwaltung_techn
+from openimmo import vermarktungsart
+from openimmo import wohnung
+from openimmo import zustand_angaben
+
+
+__all__ = [
+    "Portfolio",
+    "create",
+    "portfolio",
+    "real_estate",
+    "related_models",
+    "sqlite_database",
+]
+
+
+# (<ort>, <plz prefix>, <latitude>, <longitude>, <rent per m²>, <weight>)
+CITIES = (
+    ("Berlin", "10", 52.520, 13.405, 12.5, 30),
+    ("Hamburg", "20", 53.551, 9.994, 12.0, 15),
+    ("München", "80", 48.137, 11.576, 18.5, 12),
+    ("Köln", "50", 50.938, 6.960, 11.5, 9),
+    ("Frankfurt am Main", "60", 50.110, 8.682, 14.0, 8),
+    ("Leipzig", "04", 51.340, 12.375, 7.5, 8),
+    ("Hannover", "30", 52.375, 9.732, 9.0, 8),
+    ("Dresden", "01", 51.050, 13.737, 7.0, 6),
+    ("Bielefeld", "33", 52.030, 8.532, 7.5, 4),
+)
+# (<objektart>, <type attribute>, <types>, <weight>)
+KINDS = (
+    ("wohnung", "wohnungtyp", ("ETAGE", "DACHGESCHOSS", "ERDGESCHOSS"), 70),
+    ("haus", "haustyp", ("EINFAMILIENHAUS", "REIHENHAUS", "DOPPELHAUSHAELFTE"), 30),
+)
+ROOMS = ((1, 10), (1.5, 3), (2, 30), (2.5, 5), (3, 30), (4, 15), (5, 5), (6, 2))
+STREETS = ("Hauptstraße", "Bahnhofstraße", "Schulstraße", "Gartenstraße", "Ringstraße")
+SALE_SHARE = 0.25
+DUMMIES = {
+    "BIGINT": 0,
+    "BLOB": b"",
+    "BOOL": False,
+    "DATE": date(1970, 1, 1),
+    "DATETIME": datetime(1970, 1, 1),
+    "DECIMAL": 0,
+    "DOUBLE": 0.0,
+    "FLOAT": 0.0,
+    "INT": 0,
+    "SMALLINT": 0,
+}
+
+Portfolio = list[tuple[Any, Any]]
+
+
+def weighted(rng: Random, choices: Iterable[tuple]) -> tuple:
+    """Returns a random choice weighted by the choices' last item."""
+
+    choices = tuple(choices)
+    return rng.choices(choices, weights=[choice[-1] for choice in choices])[0]
+
+
+def real_estate(ident: int, rng: Random) -> immobilie:
+    """Returns a synthetic real estate DOM with a realistic
+    distribution of its commonly filtered and sorted fields.
+    """
+
+    ort, plz, latitude, longitude, rent, _ = weighted(rng, CITIES)
+    kind, attribute, types, _ = weighted(rng, KINDS)
+    zimmer, _ = weighted(rng, ROOMS)
+    wohnflaeche = round(max(18, rng.gauss(22 + zimmer * 22, 8)), 2)
+    sale = rng.random() < SALE_SHARE
+    kaltmiete = round(wohnflaeche * rng.gauss(rent, rent / 8), 2)
+    nebenkosten = round(wohnflaeche * rng.uniform(1.8, 3.2), 2)
+    category = objektart()
+    getattr(category, kind).append(
+        {"wohnung": wohnung, "haus": haus}[kind](**{attribute: rng.choice(types)})
+    )
+    return immobilie(
+        objektkategorie=objektkategorie(
+            nutzungsart=nutzungsart(WOHNEN=True, GEWERBE=False),
+            vermarktungsart=vermarktungsart(KAUF=sale, MIETE_PACHT=not sale),
+            objektart=category,
+        ),
+        geo=geo(
+            plz=f"{plz}{rng.randrange(1000):03d}",
+            ort=ort,
+            strasse=rng.choice(STREETS),
+            hausnummer=str(rng.randint(1, 120)),
+            land=land(iso_land="DEU"),
+            geokoordinaten=geokoordinaten(
+                breitengrad=round(latitude + rng.gauss(0, 0.05), 6),
+                laengengrad=round(longitude + rng.gauss(0, 0.08), 6),
+            ),
+            etage=rng.randint(0, 5) if kind == "wohnung" else None,
+            anzahl_etagen=rng.randint(1, 6),
+        ),
+        kontaktperson=kontaktperson(name="Muster", email_zentrale="info@example.com"),
+        preise=preise(
+            kaufpreis=round(wohnflaeche * rent * 300, -3) if sale else None,
+            kaltmiete=None if sale else kaltmiete,
+            nebenkosten=None if sale else nebenkosten,
+            warmmiete=None if sale else round(kaltmiete + nebenkosten, 2),
+        ),
+        flaechen=flaechen(
+            wohnflaeche=wohnflaeche,
+            anzahl_zimmer=zimmer,
+            anzahl_balkone=rng.choice((0, 0, 1, 1, 2)),
+        ),
+        freitexte=freitexte(
+            objekttitel=f"{zimmer} Zimmer in {ort}",
+            dreizeiler=f"{wohnflaeche} m² in {ort}",
+            objektbeschreibung=" ".join(rng.choices(STREETS, k=40)),
+        ),
+        verwaltung_objekt=verwaltung_objekt(haustiere=rng.random() < 0.3),
+        verwaltung_techn=verwaltung_techn(
+            objektnr_extern=f"SYN-{ident:06d}",
+            openimmo_obid=str(UUID(int=rng.getrandbits(128))),
+            aktion=aktion(),
+            stand_vom=date(2020, 1, 1),
+            weitergabe_generell=True,
+        ),
+        zustand_angaben=zustand_angaben(baujahr=str(rng.randint(1900, 2023))),
+    )
+
+
+def portfolio(size: int, seed: int = 0, start: int = 1) -> Portfolio:
+    """Returns a reproducible portfolio of (<orm>, <dom>) tuples
+    whose ORM stand-ins only carry the real estates' IDs.
+    """
+
+    rng = Random(f"{seed}:{size}")
+    return [
+        (SimpleNamespace(id=ident), real_estate(ident, rng))
+        for ident in range(start, start + size)
+    ]
+
+
+def create(model: type[Model], **values: Any) -> Model:
+    """Creates a record, filling the required fields which have
+    not been provided with dummy values and dummy related records.
+    """
+
+    for field in model._meta.sorted_fields:  # pylint: disable=W0212
+        if (
+            field.name in values
+            or field.null
+            or field.primary_key
+            or field.default is not None
+        ):
+            continue
+
+        if isinstance(field, ForeignKeyField):
+            values[field.name] = create(field.rel_model)
+        elif (enum := getattr(field, "enum", None)) is not None:
+            values[field.name] = next(iter(enum))
+        else:
+            values[field.name] = DUMMIES.get(field.field_type, "")
+
+    return model.create(**values)
+
+
+def related_models(*models: type[Model]) -> set[type[Model]]:
+    """Returns the models and all models they are related to."""
+
+    related = set(models)
+
+    for model in models:
+        related.update(
+            rel_model
+            for _, rel_model, _ in model._meta.model_graph()  # pylint: disable=W0212
+        )
+
+    return related
+
+
+@contextmanager
+def sqlite_database(
+    models: Iterable[type[Model]], path: Optional[Path] = None
+) -> Iterator[SqliteDatabase]:
+    """Binds the models to an SQLite database with their tables created.
+
+    Each schema of the models is attached as a database of its own,
+    so that schema-qualified table names resolve as on MySQL.
+    """
+
+    models = list(models)
+    database = SqliteDatabase(":memory:" if path is None else str(path))
+
+    schemas = {model._meta.schema for model in models}  # pylint: disable=W0212
+
+    for schema in sorted(schemas - {None}):
+        database.attach(":memory:" if path is None else f"{path}.{schema}", schema)
+
+    try:
+        with database.bind_ctx(models, bind_refs=False, bind_backrefs=False):
+            database.create_tables(models)
+            yield database
+    finally:
+        database.close()
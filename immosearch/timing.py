@@ -0,0 +1,180 @@
+"""Per-request timing of pipeline stages."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter, process_time
+from typing import Any, Iterable, Iterator, Optional
+
+from peewee import Database, DatabaseProxy
+
+
+__all__ = ["Stage", "Timings", "install", "measure", "timed"]
+
+
+TIMINGS = ContextVar("timings", default=None)
+
+
+class Stage:  # pylint: disable=R0903
+    """Exclusive wall and CPU time, item and query counts of a stage."""
+
+    def __init__(self, name: str):
+        """Sets the stage name and initializes the counters."""
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items = 0
+        self.queries = 0
+
+    def to_json(self) -> dict[str, Any]:
+        """Returns a JSON-ish dict."""
+        return {
+            "wall": round(self.wall * 1000, 3),
+            "cpu": round(self.cpu * 1000, 3),
+            "items": self.items,
+            "queries": self.queries,
+        }
+
+
+class Timings:
+    """Timings of the stages of a request.
+
+    Stages may be nested, e.g. by lazy generators calling each other.
+    The time of nested stages is subtracted from the enclosing stage.
+    """
+
+    def __init__(self):
+        """Initializes the stages and the stack of running stages."""
+        self.stages = {}
+        self.stack = []
+        self.wall = perf_counter()
+        self.cpu = process_time()
+
+    def stage(self, name: str) -> Stage:
+        """Returns the respective stage."""
+        try:
+            return self.stages[name]
+        except KeyError:
+            stage = self.stages[name] = Stage(name)
+            return stage
+
+    def enter(self, name: str):
+        """Starts timing a stage."""
+        self.stack.append([self.stage(name), perf_counter(), process_time(), 0, 0])
+
+    def exit(self):
+        """Stops timing the current stage."""
+        stage, wall, cpu, child_wall, child_cpu = self.stack.pop()
+        wall = perf_counter() - wall
+        cpu = process_time() - cpu
+        stage.wall += wall - child_wall
+        stage.cpu += cpu - child_cpu
+
+        if self.stack:
+            self.stack[-1][3] += wall
+            self.stack[-1][4] += cpu
+
+    def count_query(self):
+        """Counts a database query for the current stage."""
+        if self.stack:
+            self.stack[-1][0].queries += 1
+        else:
+            self.stage("other").queries += 1
+
+    @property
+    def total(self) -> Stage:
+        """Returns the total timing of the request."""
+        total = Stage("total")
+        total.wall = perf_counter() - self.wall
+        total.cpu = process_time() - self.cpu
+        total.queries = sum(stage.queries for stage in self.stages.values())
+        return total
+
+    def header(self) -> str:
+        """Returns a Server-Timing header value."""
+        return ", ".join(
+            f"{stage.name};dur={stage.wall * 1000:.3f};"
+            f'desc="cpu={stage.cpu * 1000:.3f}ms items={stage.items} '
+            f'queries={stage.queries}"'
+            for stage in (*self.stages.values(), self.total)
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        """Returns a JSON-ish dict."""
+        return {
+            "total": self.total.to_json(),
+            "stages": {name: stage.to_json() for name, stage in self.stages.items()},
+        }
+
+
+@contextmanager
+def measure(name: str, timings: Optional[Timings] = None):
+    """Times the enclosed code as the respective stage."""
+
+    if (timings := timings or TIMINGS.get()) is None:
+        yield
+        return
+
+    timings.enter(name)
+
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def timed(name: str, iterable: Iterable) -> Iterator:
+    """Times the iteration over the iterable as the respective stage."""
+
+    if (timings := TIMINGS.get()) is None:
+        yield from iterable
+        return
+
+    stage = timings.stage(name)
+
+    with measure(name, timings):
+        iterator = iter(iterable)
+
+    while True:
+        with measure(name, timings):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+
+        stage.items += 1
+        yield item
+
+
+def count_queries(database: Database):
+    """Counts the queries of the database instance."""
+
+    if getattr(database.execute_sql, "counted", False):
+        return
+
+    execute_sql = database.execute_sql
+
+    @wraps(execute_sql)
+    def wrapper(*args, **kwargs):
+        if (timings := TIMINGS.get()) is not None:
+            timings.count_query()
+
+        return execute_sql(*args, **kwargs)
+
+    wrapper.counted = True
+    database.execute_sql = wrapper
+
+
+def install(proxies: Iterable[DatabaseProxy]):
+    """Counts the queries of the databases behind the proxies.
+
+    Databases, which route to others, e.g. to replicas, provide
+    the databases they route to as their "databases" attribute.
+    """
+
+    for proxy in proxies:
+        if (database := proxy.obj) is None:
+            continue
+
+        for routed in getattr(database, "databases", (database,)):
+            count_queries(routed)
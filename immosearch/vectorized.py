@@ -0,0 +1,238 @@
+"""Vectorized filtering over columns of real estate attributes."""
+
+from datetime import date
+from operator import eq, ge, gt, le, lt, ne
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from immosearch.errors import SievingError
+from immosearch.expression import And, Clause, Expression, Not, Or
+from immosearch.filter import FilterableRealEstate, RealEstateSieve, parse_filters
+from immosearch.lib import Members, Operator, lazy_import
+
+try:
+    numpy = lazy_import("numpy")
+except ImportError:
+    numpy = None
+
+
+__all__ = ["Column", "Matrix", "VectorizedSieve"]
+
+
+NUMERIC = (int, float)  # Including bool.
+SCALARS = (str, int, float, date)  # Including bool and datetime.
+COMPARISONS = {
+    Operator.EQ: eq,
+    Operator.NE: ne,
+    Operator.LT: lt,
+    Operator.LE: le,
+    Operator.GT: gt,
+    Operator.GE: ge,
+}
+
+
+class Column:
+    """Values of an option over all real estates.
+
+    Numeric values are stored as floats with NaN for None, which
+    compares like None does, i.e. only != holds. Other scalars are
+    stored as codes into a dictionary of their distinct values.
+    Columns of other values are not supported.
+    """
+
+    def __init__(self, values: list[Any]):
+        """Converts the values into an array."""
+        self.numeric = None
+        self.dictionary = None
+        self.codes = None
+
+        if all(value is None or isinstance(value, NUMERIC) for value in values):
+            self.numeric = numpy.array(
+                [numpy.nan if value is None else value for value in values],
+                dtype=numpy.float64,
+            )
+        elif all(value is None or isinstance(value, SCALARS) for value in values):
+            codes = {}
+            self.codes = numpy.array(
+                [
+                    -1 if value is None else codes.setdefault(value, len(codes))
+                    for value in values
+                ],
+                dtype=numpy.int32,
+            )
+            self.dictionary = list(codes)
+
+    def mask(
+        self, operator: Operator, operation_func: Callable, value: Any
+    ) -> Optional[Any]:
+        """Returns a boolean mask of the values matching
+        the operation or None, if it cannot be vectorized.
+        """
+        if self.numeric is not None:
+            return self._numeric_mask(operator, value)
+
+        if self.codes is not None:
+            return self._dictionary_mask(operation_func, value)
+
+        return None
+
+    def _numeric_mask(self, operator: Operator, value: Any) -> Optional[Any]:
+        """Returns a mask of the numeric values matching the operation."""
+        if (comparison := COMPARISONS.get(operator)) is not None:
+            if isinstance(value, NUMERIC):
+                return comparison(self.numeric, value)
+
+            return None
+
+        if operator in {Operator.IN, Operator.NI} and isinstance(value, Members):
+            mask = numpy.isin(
+                self.numeric, [item for item in value if isinstance(item, NUMERIC)]
+            )
+            return mask if operator == Operator.IN else ~mask
+
+        return None
+
+    def _dictionary_mask(self, operation_func: Callable, value: Any) -> Any:
+        """Evaluates the operation once per distinct value and
+        maps the results onto the rows, where code -1 selects
+        the result for None.
+        """
+        table = numpy.fromiter(
+            (apply(operation_func, item, value) for item in (*self.dictionary, None)),
+            dtype=bool,
+            count=len(self.dictionary) + 1,
+        )
+        return table[self.codes]
+
+
+class Matrix:
+    """Columns of options of the real estates of one request.
+
+    Columns are shared by the clauses of the request's filters,
+    but never across requests, since the real estates may change.
+    """
+
+    def __init__(self):
+        """Initializes the columns."""
+        self.columns = {}
+
+    def column(self, operation: tuple, filterables: list) -> Column:
+        """Returns the column of the operation's option."""
+        option, operator, _, option_func, _, raw_value = operation
+
+        try:
+            return self.columns[option]
+        except KeyError:
+            pass
+
+        try:
+            values = [option_func(filterable) for filterable in filterables]
+        except (AttributeError, TypeError, ValueError):
+            values = [object()]  # Defer errors to the row engine.
+
+        return self.columns.setdefault(option, Column(values))
+
+
+def apply(operation_func: Callable, item: Any, value: Any) -> bool:
+    """Applies the operation like the row engine does."""
+
+    try:
+        return bool(operation_func(item, value))
+    except (TypeError, ValueError):
+        return False
+
+
+class VectorizedSieve:
+    """Sieves real estates by combining boolean masks of option columns.
+
+    Clauses, which cannot be vectorized, are evaluated by the row
+    engine on the rows, which the preceding clauses did not decide,
+    so that errors are raised like the short-circuiting row engine
+    does. Without NumPy, the row engine sieves entirely.
+    """
+
+    def __init__(
+        self,
+        real_estates: Iterable,
+        filters: Optional[str],
+        filterable: type = FilterableRealEstate,
+    ):
+        """Sets the real estates, the filters and
+        the class to wrap the real estates for evaluation.
+        """
+        self.real_estates = real_estates
+        self.filters = filters
+        self.filterable = filterable
+
+    def __iter__(self) -> Iterator:
+        """Yields the real estates matching the filters."""
+        if numpy is None:
+            yield from RealEstateSieve(
+                self.real_estates, self.filters, filterable=self.filterable
+            )
+            return
+
+        if not self.filters:
+            yield from self.real_estates
+            return
+
+        expression = parse_filters(self.filters)
+
+        if not (real_estates := list(self.real_estates)):
+            return
+
+        matrix = Matrix()
+        filterables = [self.filterable(dom) for _, dom in real_estates]
+
+        active = numpy.ones(len(filterables), dtype=bool)
+        mask = self.mask(expression, matrix, filterables, active)
+
+        for index in numpy.flatnonzero(mask):
+            yield real_estates[index]
+
+    def mask(self, expression: Expression, matrix: Matrix, filterables: list, active):
+        """Returns the boolean mask of the expression, which
+        is only meaningful for the rows of the active mask.
+        """
+        if isinstance(expression, Clause):
+            return self.clause_mask(expression, matrix, filterables, active)
+
+        if isinstance(expression, Not):
+            return ~self.mask(expression.child, matrix, filterables, active)
+
+        if isinstance(expression, Or):
+            mask = numpy.zeros(len(filterables), dtype=bool)
+
+            for child in expression.children:
+                mask |= self.mask(child, matrix, filterables, active & ~mask)
+
+            return mask
+
+        if isinstance(expression, And):
+            mask = active.copy()
+
+            for child in expression.children:
+                mask &= self.mask(child, matrix, filterables, mask)
+
+            return mask
+
+        raise TypeError(f"Unsupported expression: {expression}")
+
+    def clause_mask(self, clause: Clause, matrix: Matrix, filterables: list, active):
+        """Returns the boolean mask of a clause."""
+        option, operator, operation_func, _, value, raw_value = clause.operation
+        column = matrix.column(clause.operation, filterables)
+
+        try:
+            mask = column.mask(operator, operation_func, value)
+        except AttributeError:
+            raise SievingError(option, operator, raw_value) from None
+
+        if mask is not None:
+            return mask
+
+        mask = numpy.zeros(len(filterables), dtype=bool)
+
+        for index in numpy.flatnonzero(active):
+            mask[index] = filterables[index].apply(clause.operation)
+
+        return mask
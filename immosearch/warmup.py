@@ -0,0 +1,218 @@
+"""Warm-up of worker processes before they serve requests.
+
+Gunicorn workers are warmed up by importing the hook
+into the Gunicorn configuration file:
+
+    from immosearch.warmup import post_worker_init
+
+Workers of other servers are warmed up in the background,
+once their readiness is checked for the first time.
+Errors during the warm-up are logged and never keep
+a worker from starting.
+"""
+
+from importlib import import_module
+from logging import getLogger
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep
+from typing import Iterator, Optional
+
+from peewee import PeeweeException
+
+from immosearch.config import get_config
+from immosearch.errors import RenderableError
+from immosearch.filter import parse_filters
+from immosearch.snapshot import Snapshot
+
+
+__all__ = ["is_ready", "post_worker_init", "warm_up"]
+
+
+LOGGER = getLogger("immosearch.warmup")
+SECTION = "warmup"
+READY = Event()
+STARTED = Lock()  # Acquired once the warm-up started.
+RETRIES = 3
+RETRY_DELAY = 1  # seconds
+# Modules, which are expensive to import, most notably the PyXB bindings.
+MODULES = (
+    "pyxb",
+    "openimmo",
+    "openimmolib.types",
+    "openimmolib.util",
+    "openimmodb",
+    "mdb",
+)
+OPTIONAL_MODULES = ("numpy",)
+
+
+def get_lines(option: str) -> Iterator[str]:
+    """Yields the non-empty lines of a multi-line option."""
+
+    for line in get_config().get(SECTION, option, fallback="").splitlines():
+        if line := line.strip():
+            yield line
+
+
+def import_modules():
+    """Imports the heavy modules and the configured ones."""
+
+    for name in (*MODULES, *get_lines("modules")):
+        import_module(name)
+
+    for name in OPTIONAL_MODULES:
+        try:
+            import_module(name)
+        except ImportError:
+            continue
+
+
+def connect(retries: int = RETRIES, delay: float = RETRY_DELAY) -> bool:
+    """Opens the worker's database connections and, if pooled,
+    returns them to their pools to be reused by requests.
+    Returns True iff all databases could be connected to.
+    """
+
+    # pylint: disable=C0415
+    from mdb import Customer
+    from openimmodb import Immobilie
+
+    from immosearch.orm import DATABASE
+    from immosearch.pool import release
+
+    databases = {
+        DATABASE,
+        Customer._meta.database,  # pylint: disable=W0212
+        Immobilie._meta.database,  # pylint: disable=W0212
+    }
+
+    for attempt in range(1, retries + 1):
+        try:
+            for database in databases:
+                database.connect(reuse_if_open=True)
+        except PeeweeException as error:
+            LOGGER.warning("Connecting failed (%i/%i): %s", attempt, retries, error)
+
+            if attempt < retries:
+                sleep(delay)
+        else:
+            return True
+        finally:
+            release()
+
+    return False
+
+
+def compile_filters() -> int:
+    """Compiles the configured filters into the
+    expression cache and returns their amount.
+    """
+
+    count = 0
+
+    for filters in get_lines("filters"):
+        try:
+            parse_filters(filters)
+        except RenderableError:
+            LOGGER.warning("Invalid warm-up filter: %s", filters)
+        else:
+            count += 1
+
+    return count
+
+
+def request(application) -> int:
+    """Requests the configured "<cid> [<query>]" lines to
+    build DOMs and populate the caches of the respective
+    customers and returns the amount of requests.
+    """
+
+    count = 0
+
+    with application.test_client() as client:
+        for line in get_lines("queries"):
+            url = Snapshot.fromline(line).url
+            start = perf_counter()
+
+            try:
+                response = client.get(url)
+            except Exception:  # pylint: disable=W0703
+                LOGGER.exception("Warm-up request failed: %s", url)
+                continue
+
+            count += 1
+            LOGGER.info(
+                "Warmed up %s: %i in %.3f s.",
+                url,
+                response.status_code,
+                perf_counter() - start,
+            )
+
+    return count
+
+
+def warm_up(application: Optional[object] = None):
+    """Warms up the worker and reports it ready afterwards.
+    Without database connections, the worker is reported ready
+    without warming up the caches, which would fail anyway.
+    """
+
+    if application is None:
+        from immosearch.wsgi import APPLICATION  # pylint: disable=C0415
+
+        application = APPLICATION
+
+    start = perf_counter()
+    import_modules()
+    filters = compile_filters()
+
+    if connect():
+        requests = request(application)
+    else:
+        LOGGER.error("Skipping warm-up requests without database connections.")
+        requests = 0
+
+    READY.set()
+    LOGGER.info(
+        "Worker ready after %.3f s with %i filters and %i requests.",
+        perf_counter() - start,
+        filters,
+        requests,
+    )
+
+
+def try_warm_up():
+    """Warms up the worker and reports it ready, even if that failed."""
+
+    try:
+        warm_up()
+    except Exception:  # pylint: disable=W0703
+        LOGGER.exception("Warming up failed.")
+        READY.set()
+
+
+def is_ready() -> bool:
+    """Checks whether the worker has been warmed up.
+
+    If the Gunicorn hook did not warm up the worker,
+    the first check starts the warm-up in the background.
+    """
+
+    if READY.is_set():
+        return True
+
+    if STARTED.acquire(blocking=False):
+        Thread(target=try_warm_up, name="immosearch-warmup", daemon=True).start()
+
+    return False
+
+
+def post_worker_init(worker):
+    """Gunicorn hook to warm up a worker before it accepts connections.
+    Errors are logged, since raising them would halt Gunicorn.
+    """
+
+    worker.log.info("Warming up worker %s.", worker.pid)
+
+    if STARTED.acquire(blocking=False):
+        try_warm_up()
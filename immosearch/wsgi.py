@@ -1,36 +1,98 @@
 """WSGI app."""
 
 from enum import Enum
+from heapq import merge
+from json import dumps
+from logging import getLogger
+from itertools import chain, islice
+from operator import itemgetter
 from urllib.parse import unquote
 
-from flask import request
-from pyxb import PyXBException
+from flask import Response, g, request, send_file
 
 from mdb import Customer
-from openimmo import anbieter
-from openimmo import CTD_ANON_67 as feld
-from openimmo import user_defined_extend
-from openimmo import user_defined_simplefield
 from openimmodb import Immobilie, Anhang
-from wsgilib import OK, XML, Binary, Application
+from wsgilib import JSON, OK, XML, Binary, Application
 
+from immosearch.cache import get_cache
+from immosearch.changes import get_feed
+from immosearch.compression import COMPRESSIBLE, MIN_SIZE, negotiate, stream
+from immosearch.config import get_config
 from immosearch.errors import NoSuchCustomer
+from immosearch.errors import NoSuchSavedSearch
 from immosearch.errors import InvalidOptionsCount
 from immosearch.errors import NotAnInteger
+from immosearch.errors import NotAuthorized
 from immosearch.errors import InvalidParameterError
 from immosearch.errors import UserNotAllowed
 from immosearch.errors import AttachmentNotFound
+from immosearch.expression import get_statistics
+from immosearch.filter import FilterableRealEstate
 from immosearch.filter import RealEstateSieve
+from immosearch.filter import geo_regions
+from immosearch.filter import sql_condition
+from immosearch.fulltext import search as search_texts
+from immosearch.index import IndexedRealEstate
+from immosearch.index import get_outside
+from immosearch.index import get_records
+from immosearch.index import is_complete
+from immosearch.index import is_indexable
+from immosearch.index import load_real_estates
+from immosearch.metrics import FLAWED
+from immosearch.metrics import ITEMS
+from immosearch.metrics import QUERIES
+from immosearch.metrics import REQUESTS
+from immosearch.metrics import REQUEST_DURATION
+from immosearch.metrics import STAGE_DURATION
+from immosearch.metrics import dump
+from immosearch.metrics import render as render_metrics
+from immosearch.lib import iterbatches, lazy_import
+from immosearch.orm import DATABASE
 from immosearch.orm import Blacklist
+from immosearch.orm import SavedSearch
 from immosearch.pager import Pager
+from immosearch.pool import MaxConnectionsExceeded
+from immosearch.pool import exhausted
+from immosearch.pool import install as install_pool
+from immosearch.pool import release
+from immosearch.profiling import finish as finish_profile
+from immosearch.profiling import start as start_profile
+from immosearch.replica import READ_ONLY
+from immosearch.replica import install as install_replicas
+from immosearch.saved import create as create_saved_search
+from immosearch.saved import get_new_matches
+from immosearch.saved import is_authorized
+from immosearch.saved import may_create
 from immosearch.selector import RealEstateDataSelector
+from immosearch.snapshot import compressed_path, lookup
 from immosearch.sort import RealEstateSorter
+from immosearch.timing import TIMINGS, Timings, install, measure, timed
+from immosearch.vectorized import VectorizedSieve
+from immosearch.warmup import is_ready
+
+openimmo = lazy_import("openimmo")
+pyxb = lazy_import("pyxb")
 
 
 __all__ = ["APPLICATION"]
 
 
 APPLICATION = Application("ImmoSearch", cors=True, debug=True)
+AUTHORIZATION_TTL = 60  # seconds
+GROUPS = "groups"  # Config section of "<name> = <cid>, <cid>, …" customer groups.
+LOGGER = getLogger("immosearch")
+KEY_HEADER = "X-API-Key"  # Key to create saved searches, if configured.
+SECRET_HEADER = "X-Secret"  # Secret of a saved search.
+DATABASES = (
+    DATABASE,
+    Customer._meta.database,  # pylint: disable=W0212
+    Immobilie._meta.database,  # pylint: disable=W0212
+)
+# Endpoints, which only read and may thus be served by replicas.
+READ_ONLY_ENDPOINTS = {"get_attachment", "get_customer", "search"}
+install_pool(DATABASES)
+install_replicas(DATABASES)
+install(DATABASES)
 
 
 class Separators(Enum):
@@ -51,6 +113,10 @@ class Operations(Enum):
     SORT = "sort"
     PAGING = "paging"
     NOCACHE = "nocache"
+    SINCE = "since"
+    QUERY = "q"
+    CUSTOMERS = "customers"
+    GROUP = "group"
 
 
 class PathNodes(Enum):
@@ -116,54 +182,233 @@ def _get_paging(value):
     return (limit, page)
 
 
-def _get_real_estates(customer):
-    """Returns real estates for the respective customer."""
+def _get_customer_ids(value):
+    """Generate customer IDs."""
+
+    for cid in value.split(Separators.OPTION.value):
+        try:
+            yield int(cid)
+        except ValueError:
+            raise NotAnInteger(cid) from None
+
+
+def _get_real_estates(customer, filters=None):
+    """Returns real estates for the respective customer.
+
+    Real estates outside of geo regions are pre-selected by their
+    indexed coordinates only while the index is complete and current,
+    since the sieve evaluates the regions on the DOMs anyway.
+    """
+
+    query = Immobilie.by_customer(customer)
+
+    if (condition := sql_condition(filters, Immobilie)) is not None:
+        query = query.where(condition)
+
+    if (regions := geo_regions(filters)) and is_complete(customer):
+        for region in regions:
+            query = query.where(Immobilie.id.not_in(get_outside(customer, region)))
+
+    for real_estate in timed("fetch", iterbatches(query, Immobilie.id)):
+        with measure("to_dom"):
+            dom = real_estate.to_dom()
+
+        yield (real_estate, dom)
+
 
-    for real_estate in Immobilie.by_customer(customer):
-        yield (real_estate, real_estate.to_dom())
+def _search_real_estates(customer, filters, query):
+    """Returns the customer's real estates, optionally
+    narrowed by a full-text query and ranked by relevance.
+    """
 
+    if not query:
+        return _get_real_estates(customer, filters)
+
+    with measure("fulltext"):
+        idents = search_texts(customer, query)
+
+    return timed("fetch", load_real_estates(idents))
+
+
+def _get_origin(filters):
+    """Returns the origin to sort by distance from."""
+
+    for region in geo_regions(filters):
+        return region.center
+
+    return None
+
+
+def _filter_indexed_real_estates(customer, filters, sort, paging, includes):
+    """Perform sieving, sorting and paging on the search index
+    and build DOMs only for the selected real estates.
+    """
+
+    records = timed("fetch", get_records(customer, filters))
+
+    if filters is not None:
+        records = timed(
+            "sieve",
+            _sieve(
+                records,
+                filters,
+                customer,
+                exhaustive=sort is not None,
+                filterable=IndexedRealEstate,
+            ),
+        )
 
-def _filter_real_estates(real_estates, filters, sort, paging, includes):
+    if sort is not None:
+        records = timed(
+            "sort",
+            RealEstateSorter(
+                records, sort, origin=_get_origin(filters), filterable=IndexedRealEstate
+            ),
+        )
+
+    if paging is not None:
+        page_size, page_num = paging
+        records = timed("page", Pager(records, limit=page_size, page=page_num))
+
+    real_estates = timed(
+        "to_dom", load_real_estates(record.immobilie_id for record, _ in records)
+    )
+    return timed("select", RealEstateDataSelector(real_estates, selections=includes))
+
+
+def _filter_real_estates(real_estates, filters, sort, paging, includes, customer):
     """Perform sieving, sorting and rendering."""
 
     if filters is not None:
-        real_estates = RealEstateSieve(real_estates, filters)
+        real_estates = timed(
+            "sieve",
+            _sieve(
+                real_estates,
+                filters,
+                customer,
+                exhaustive=sort is not None,
+            ),
+        )
 
-    real_estates = RealEstateDataSelector(real_estates, selections=includes)
+    real_estates = timed(
+        "select", RealEstateDataSelector(real_estates, selections=includes)
+    )
 
     if sort is not None:
-        real_estates = RealEstateSorter(real_estates, sort)
+        real_estates = timed(
+            "sort", RealEstateSorter(real_estates, sort, origin=_get_origin(filters))
+        )
 
     if paging is not None:
         page_size, page_num = paging
-        real_estates = Pager(real_estates, limit=page_size, page=page_num)
+        real_estates = timed(
+            "page", Pager(real_estates, limit=page_size, page=page_num)
+        )
 
     return real_estates
 
 
-def _set_paging(anbieter, paging):  # pylint: disable=W0621
+def _sieve(
+    real_estates, filters, customer, exhaustive, filterable=FilterableRealEstate
+):
+    """Returns a sieve of the real estates.
+
+    If all real estates are held anyway for sorting, they are sieved
+    vectorized. Otherwise they are streamed through the row engine,
+    so that only matching real estates are held and paging can stop
+    early.
+    """
+
+    if exhaustive:
+        return VectorizedSieve(real_estates, filters, filterable=filterable)
+
+    return RealEstateSieve(
+        real_estates,
+        filters,
+        filterable=filterable,
+        statistics=get_statistics(customer.id),
+    )
+
+
+def _get_merged_real_estates(customers, filters, sort, paging):
+    """Sieves and sorts the real estates of each customer and merges them
+    into one sorted stream, keeping only as many real estates per
+    customer as are needed to fill the requested page.
+    """
+
+    limit = None if paging is None else (paging[1] + 1) * paging[0]
+    origin = _get_origin(filters)
+    streams = []
+
+    for customer in customers:
+        real_estates = _tag_real_estates(
+            _get_real_estates(customer, filters), customer
+        )
+
+        if filters is not None:
+            real_estates = _sieve(
+                real_estates,
+                filters,
+                customer,
+                exhaustive=sort is not None,
+            )
+
+        if sort is None:
+            streams.append(islice(real_estates, limit))
+        else:
+            streams.append(
+                RealEstateSorter(real_estates, sort, origin=origin, limit=limit).sorted
+            )
+
+    if sort is None:
+        return chain.from_iterable(streams)
+
+    return map(itemgetter(1), merge(*streams, key=itemgetter(0)))
+
+
+def _tag_real_estates(real_estates, customer):
+    """Tags the real estates with the customer's realtor number."""
+
+    for orm, dom in real_estates:
+        dom.user_defined_simplefield.append(
+            openimmo.user_defined_simplefield(repr(customer), feldname="anbieternr")
+        )
+        yield (orm, dom)
+
+
+def _set_paging(anbieter, paging):
     """Sets paging information."""
 
     if paging is not None:
         page_size, page_num = paging
         anbieter.user_defined_simplefield.append(
-            user_defined_simplefield(page_size, feldname="page_size")
+            openimmo.user_defined_simplefield(page_size, feldname="page_size")
         )
         anbieter.user_defined_simplefield.append(
-            user_defined_simplefield(page_num, feldname="page_num")
+            openimmo.user_defined_simplefield(page_num, feldname="page_num")
         )
 
 
 def _gen_anbieter(customer, paging):
     """Generates an openimmo.anbieter DOM."""
 
-    result = anbieter(
+    result = openimmo.anbieter(
         anbieternr=repr(customer), firma=str(customer), openimmo_anid=repr(customer)
     )
     _set_paging(result, paging)
     return result
 
 
+def _gen_search_anbieter(paging):
+    """Generates an openimmo.anbieter DOM for multi-customer searches."""
+
+    result = openimmo.anbieter(
+        anbieternr="immosearch", firma="ImmoSearch", openimmo_anid="immosearch"
+    )
+    _set_paging(result, paging)
+    return result
+
+
 def _get_attachment(ident):
     """REturns the respective attachment."""
 
@@ -180,6 +425,7 @@ def _get_options():
     sort = None
     paging = None
     includes = None
+    query = None
 
     for key, value in request.args.items():
         try:
@@ -195,32 +441,111 @@ def _get_options():
             sort = tuple(_get_sorting(value))
         elif key == Operations.PAGING.value:
             paging = _get_paging(value)
+        elif key == Operations.QUERY.value:
+            query = value
 
-    return (filters, sort, paging, includes)
+    return (filters, sort, paging, includes, query)
 
 
 def _get_customer(cid):
     """Returns the respective customer."""
 
+    with measure("customer"):
+        try:
+            return Customer.select(cascade=True).where(Customer.id == cid).get()
+        except Customer.DoesNotExist:
+            raise NoSuchCustomer(cid) from None
+
+
+def _get_saved_search(ident):
+    """Returns the respective saved search,
+    if the request provides its secret.
+    """
+
     try:
-        return Customer.select(cascade=True).where(Customer.id == cid).get()
-    except Customer.DoesNotExist:
-        raise NoSuchCustomer(cid) from None
+        saved_search = SavedSearch.get(SavedSearch.id == ident)
+    except SavedSearch.DoesNotExist:
+        raise NoSuchSavedSearch(ident) from None
+
+    if not is_authorized(saved_search, request.headers.get(SECRET_HEADER)):
+        raise NotAuthorized(f"saved search {ident}")
+
+    return saved_search
+
 
+def _is_allowed(cid):
+    """Checks whether the respective customer is not blacklisted."""
 
-def _set_validated_real_estates(anbieter, real_estates):  # pylint: disable=W0621
+    cache = get_cache("authorization")
+
+    if (allowed := cache.get(cid)) is None:
+        with measure("authorize"):
+            allowed = not Blacklist.select().where(Blacklist.customer == cid).exists()
+
+        cache.set(cid, allowed, ttl=AUTHORIZATION_TTL)
+
+    return allowed
+
+
+def _get_group_ids(name):
+    """Generate the customer IDs of the respective configured group."""
+
+    if (value := get_config().get(GROUPS, name, fallback=None)) is None:
+        raise InvalidParameterError(f"{Operations.GROUP.value}={name}")
+
+    for cid in value.replace(Separators.OPTION.value, " ").split():
+        try:
+            yield int(cid)
+        except ValueError:
+            raise NotAnInteger(cid) from None
+
+
+def _get_allowed_customers():
+    """Returns the requested customers and those of
+    the requested group, which are not blacklisted.
+    """
+
+    cids = set()
+
+    if (value := request.args.get(Operations.CUSTOMERS.value)) is not None:
+        cids.update(_get_customer_ids(unquote(value)))
+
+    if (name := request.args.get(Operations.GROUP.value)) is not None:
+        cids.update(_get_group_ids(unquote(name)))
+
+    if not cids:
+        raise InvalidParameterError(Operations.CUSTOMERS.value)
+
+    blacklisted = Blacklist.select(Blacklist.customer).where(
+        Blacklist.customer << cids
+    )
+    return (
+        Customer.select(cascade=True)
+        .where((Customer.id << cids) & (Customer.id.not_in(blacklisted)))
+        .order_by(Customer.id)
+    )
+
+
+def _set_validated_real_estates(anbieter, real_estates):
     """Sets validated real estates."""
-    flawed = user_defined_extend()
+    with measure("validate"):
+        return _validate_real_estates(anbieter, real_estates)
+
+
+def _validate_real_estates(anbieter, real_estates):
+    """Validates the real estates and sets them on the realtor."""
+    flawed = openimmo.user_defined_extend()
     count = 0
 
     for count, (_, dom) in enumerate(real_estates, start=1):
         try:
             dom.toxml()
-        except PyXBException as error:
+        except pyxb.PyXBException as error:
             value = str(dom.verwaltung_techn.objektnr_extern)
-            feld_ = feld(name="Flawed real estate", wert=value)
+            feld_ = openimmo.CTD_ANON_67(name="Flawed real estate", wert=value)
             feld_.typ.append(str(error))
             flawed.feld.append(feld_)
+            FLAWED.inc()
         else:
             anbieter.immobilie.append(dom)
 
@@ -228,11 +553,174 @@ def _set_validated_real_estates(anbieter, real_estates):  # pylint: disable=W062
         anbieter.user_defined_extend.append(flawed)
 
     anbieter.user_defined_simplefield.append(
-        user_defined_simplefield(count, feldname="count")
+        openimmo.user_defined_simplefield(count, feldname="count")
     )
     return anbieter
 
 
+def _set_removed_real_estates(anbieter, removed):
+    """Sets tombstones of removed real estates."""
+
+    tombstones = openimmo.user_defined_extend()
+
+    for ident, objektnr_extern in removed:
+        feld_ = openimmo.CTD_ANON_67(
+            name="Removed real estate", wert=objektnr_extern or str(ident)
+        )
+        tombstones.feld.append(feld_)
+
+    if tombstones.feld:
+        anbieter.user_defined_extend.append(tombstones)
+
+
+def _render(anbieter):
+    """Renders the realtor DOM."""
+
+    with measure("render"):
+        return XML(anbieter)
+
+
+def _send_snapshot(path):
+    """Sends a snapshot file, precompressed if possible."""
+
+    if (encoding := negotiate(request.headers.get("Accept-Encoding"))) is not None:
+        if (compressed := compressed_path(path, encoding)).is_file():
+            path = compressed
+        else:
+            encoding = None
+
+    response = send_file(path, mimetype="application/xml")
+
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@APPLICATION.before_request
+def start_timing():
+    """Starts timing and, if configured, profiling the request."""
+
+    g.timings = TIMINGS.set(Timings())
+    g.profile = start_profile()
+
+
+@APPLICATION.after_request
+def finish_timing(response):
+    """Sets the Server-Timing header, logs the request's timings
+    and writes its profile, if any.
+    """
+
+    if (timings := TIMINGS.get()) is None:
+        return response
+
+    response.headers["Server-Timing"] = timings.header()
+    _record_metrics(timings, response)
+    LOGGER.info(
+        "%s",
+        dumps(
+            {
+                "path": request.path,
+                "query": request.query_string.decode(),
+                "status": response.status_code,
+                **timings.to_json(),
+            }
+        ),
+    )
+    TIMINGS.reset(g.pop("timings"))
+    finish_profile(
+        g.pop("profile", None),
+        (request.view_args or {}).get("cid"),
+        request.query_string.decode(),
+    )
+    return response
+
+
+def _record_metrics(timings, response):
+    """Records the request's metrics."""
+
+    endpoint = request.url_rule.rule if request.url_rule else "unknown"
+    customer = (request.view_args or {}).get("cid", "")
+    REQUESTS.inc(endpoint, response.status_code)
+    REQUEST_DURATION.observe(timings.total.wall, endpoint, customer)
+
+    for stage in timings.stages.values():
+        STAGE_DURATION.observe(stage.wall, stage.name)
+        QUERIES.inc(stage.name, amount=stage.queries)
+        ITEMS.inc(stage.name, amount=stage.items)
+
+    dump()
+
+
+@APPLICATION.after_request
+def compress_response(response):
+    """Compresses the response as negotiated with the client."""
+
+    if (
+        response.direct_passthrough
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE
+    ):
+        return response
+
+    if (length := response.content_length) is not None and length < MIN_SIZE:
+        return response
+
+    if (encoding := negotiate(request.headers.get("Accept-Encoding"))) is None:
+        return response
+
+    response.response = stream(response.iter_encoded(), encoding)
+    response.headers["Content-Encoding"] = encoding
+    response.headers.pop("Content-Length", None)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@APPLICATION.before_request
+def route_to_replicas():
+    """Routes the queries of read-only endpoints to the replicas."""
+
+    if request.endpoint in READ_ONLY_ENDPOINTS:
+        g.read_only = READ_ONLY.set(True)
+
+
+@APPLICATION.teardown_request
+def release_connections(_):
+    """Returns the request's database connections to their pools."""
+
+    release()
+
+    if (token := g.pop("read_only", None)) is not None:
+        READ_ONLY.reset(token)
+
+
+@APPLICATION.errorhandler(MaxConnectionsExceeded)
+def handle_exhausted_pool(_):
+    """Rejects requests, which timed out waiting for a database connection."""
+
+    LOGGER.warning("Database connection pool exhausted.")
+    return exhausted()
+
+
+@APPLICATION.route("/metrics", strict_slashes=False)
+def get_metrics():
+    """Returns metrics in the Prometheus text exposition format."""
+
+    return Response(render_metrics(), content_type="text/plain; version=0.0.4")
+
+
+@APPLICATION.route("/ready", strict_slashes=False)
+def get_readiness():
+    """Reports whether the worker has been warmed up."""
+
+    if is_ready():
+        return Response("Ready.", content_type="text/plain")
+
+    return Response("Warming up.", status=503, content_type="text/plain")
+
+
 @APPLICATION.route("/attachment/<int:ident>", strict_slashes=False)
 def get_attachment(ident):
     """Returns the respective attachment."""
@@ -249,16 +737,135 @@ def get_attachment(ident):
 def get_customer(cid):
     """Returns the respective customer's real estates."""
 
-    filters, sort, paging, includes = _get_options()
+    if not _is_allowed(cid):
+        return UserNotAllowed(cid)
+
+    if (snapshot := lookup(cid, request.query_string.decode())) is not None:
+        return _send_snapshot(snapshot)
+
+    filters, sort, paging, includes, query = _get_options()
     customer = _get_customer(cid)
 
-    try:
-        Blacklist.get(Blacklist.customer == customer)
-    except Blacklist.DoesNotExist:
+    if not query and is_indexable(filters, sort) and is_complete(customer):
+        real_estates = _filter_indexed_real_estates(
+            customer, filters, sort, paging, includes
+        )
+    else:
         real_estates = _filter_real_estates(
-            _get_real_estates(customer), filters, sort, paging, includes
+            _search_real_estates(customer, filters, query),
+            filters,
+            sort,
+            paging,
+            includes,
+            customer,
         )
-        anbieter = _gen_anbieter(customer, paging)  # pylint: disable=W0621
-        return XML(_set_validated_real_estates(anbieter, real_estates))
 
-    return UserNotAllowed(cid)
+    anbieter = _gen_anbieter(customer, paging)
+    return _render(_set_validated_real_estates(anbieter, real_estates))
+
+
+@APPLICATION.route("/customer/<int:cid>/changes", strict_slashes=False)
+def get_changes(cid):
+    """Returns the respective customer's real estates, which
+    have been added, modified or removed since the given token.
+    """
+
+    _, _, _, includes, _ = _get_options()
+    customer = _get_customer(cid)
+
+    if not _is_allowed(customer.id):
+        return UserNotAllowed(cid)
+
+    feed = get_feed(customer, request.args.get(Operations.SINCE.value))
+    real_estates = RealEstateDataSelector(
+        load_real_estates(feed.changed), selections=includes
+    )
+    anbieter = _gen_anbieter(customer, None)
+    _set_validated_real_estates(anbieter, real_estates)
+    _set_removed_real_estates(anbieter, feed.removed)
+    anbieter.user_defined_simplefield.append(
+        openimmo.user_defined_simplefield(feed.token, feldname="token")
+    )
+    return _render(anbieter)
+
+
+@APPLICATION.route("/customer/<int:cid>/saved", methods=["POST"], strict_slashes=False)
+def save_search(cid):
+    """Saves a search of the respective customer and returns
+    its ID and the secret, which is required to access it.
+    """
+
+    if not may_create(request.headers.get(KEY_HEADER)):
+        return NotAuthorized(KEY_HEADER)
+
+    customer = _get_customer(cid)
+
+    if not _is_allowed(customer.id):
+        return UserNotAllowed(cid)
+
+    if not (filters := request.args.get(Operations.FILTER.value)):
+        return InvalidParameterError(Operations.FILTER.value)
+
+    saved_search, secret = create_saved_search(customer, unquote(filters))
+    return JSON({"id": saved_search.id, "secret": secret}, status=201)
+
+
+@APPLICATION.route("/saved/<int:ident>", methods=["DELETE"], strict_slashes=False)
+def delete_saved_search(ident):
+    """Deletes the respective saved search."""
+
+    saved_search = _get_saved_search(ident)
+
+    if not _is_allowed(saved_search.customer_id):
+        return UserNotAllowed(saved_search.customer_id)
+
+    saved_search.delete_instance()
+    return OK(f"Deleted saved search: {ident}.")
+
+
+@APPLICATION.route("/saved/<int:ident>/new", strict_slashes=False)
+def get_saved_search_matches(ident):
+    """Returns the real estates, which started to match
+    the respective saved search since the given token.
+
+    The matches are determined when the search index is synchronized,
+    so that only changed real estates are matched against the search.
+    """
+
+    _, _, _, includes, _ = _get_options()
+    saved_search = _get_saved_search(ident)
+    customer = _get_customer(saved_search.customer)
+
+    if not _is_allowed(customer.id):
+        return UserNotAllowed(customer.id)
+
+    matches = get_new_matches(saved_search, request.args.get(Operations.SINCE.value))
+    real_estates = RealEstateDataSelector(
+        load_real_estates(matches.idents), selections=includes
+    )
+    anbieter = _gen_anbieter(customer, None)
+    _set_validated_real_estates(anbieter, real_estates)
+    anbieter.user_defined_simplefield.append(
+        openimmo.user_defined_simplefield(matches.token, feldname="token")
+    )
+    return _render(anbieter)
+
+
+@APPLICATION.route("/search", strict_slashes=False)
+def search():
+    """Returns the real estates of multiple customers,
+    selected by their IDs, a configured group or both.
+    """
+
+    filters, sort, paging, includes, _ = _get_options()
+    real_estates = _get_merged_real_estates(
+        _get_allowed_customers(), filters, sort, paging
+    )
+
+    if paging is not None:
+        page_size, page_num = paging
+        real_estates = Pager(real_estates, limit=page_size, page=page_num)
+
+    real_estates = RealEstateDataSelector(real_estates, selections=includes)
+    anbieter = _gen_search_anbieter(paging)
+    return _render(_set_validated_real_estates(anbieter, real_estates))
@@ -8,7 +8,6 @@ setup(
     use_scm_version={"local_scheme": "node-and-timestamp"},
     setup_requires=["setuptools_scm"],
     install_requires=[
-        "boolparse",
         "configlib",
         "flask",
         "mdb",
@@ -25,6 +24,16 @@ setup(
     maintainer="Richard Neumann",
     maintainer_email="r.neumann@homeinfo.de",
     packages=["immosearch"],
+    entry_points={
+        "console_scripts": [
+            "immosearch-benchmark = immosearch.benchmark:main",
+            "immosearch-heartbeat = immosearch.replica:main",
+            "immosearch-importtime = immosearch.importtime:main",
+            "immosearch-loadtest = immosearch.loadtest:main",
+            "immosearch-snapshots = immosearch.snapshot:main",
+            "immosearch-sync = immosearch.index:main",
+        ]
+    },
     license=open("LICENSE.txt").read(),
     description="Real estate search engine.",
 )
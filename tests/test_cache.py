@@ -0,0 +1,109 @@
+"""Tests of the cache backends."""
+
+from time import time
+
+from immosearch import cache
+from immosearch.cache import MISSING, TMP_TTL, FileCache, LRUCache
+
+
+class Clock:
+    """A clock, which only advances when told to."""
+
+    def __init__(self):
+        """Starts at the current time."""
+        self.now = time()
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+    def advance(self, seconds: float):
+        """Advances the clock."""
+        self.now += seconds
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Tests that the least recently used value is evicted."""
+
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert "b" not in lru
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert len(lru) == 2
+
+
+def test_lru_cache_expires_values(monkeypatch):
+    """Tests that values expire after their TTL."""
+
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    lru = LRUCache()
+    lru.set("key", "value", ttl=10)
+    lru.set("forever", "value")
+    clock.advance(5)
+    assert lru.get("key") == "value"
+    clock.advance(10)
+    assert lru.get("key") is None
+    assert lru.get("forever") == "value"
+    assert len(lru) == 1
+
+
+def test_lru_cache_counts_hits_and_misses():
+    """Tests the hit and miss counters."""
+
+    lru = LRUCache()
+    assert lru.ratio is None
+    lru.set("key", None)
+    assert lru.get("key", MISSING) is None
+    assert lru.get("other", MISSING) is MISSING
+    assert (lru.hits, lru.misses) == (1, 1)
+    assert lru.ratio == 0.5
+
+
+def test_file_cache_expires_values(monkeypatch, tmp_path):
+    """Tests that expired files are removed when they are read."""
+
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    files = FileCache(tmp_path)
+    files.set("key", {"value": 1}, ttl=10)
+    assert files.get("key") == {"value": 1}
+    clock.advance(20)
+    assert files.get("key") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_file_cache_sweep(monkeypatch, tmp_path):
+    """Tests that a sweep removes expired and leftover temporary files."""
+
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    files = FileCache(tmp_path)
+    files.set("expiring", 1, ttl=10)
+    files.set("fresh", 2, ttl=100)
+    files.set("forever", 3)
+    (leftover := tmp_path / "leftover.1.tmp").write_bytes(b"")
+    assert files.sweep() == 0
+    clock.advance(TMP_TTL + 20)
+    assert files.sweep() == 2
+    assert not leftover.exists()
+    assert "expiring" not in files
+    assert files.get("fresh") == 2
+    assert files.get("forever") == 3
+
+
+def test_file_cache_sweeps_on_set(monkeypatch, tmp_path):
+    """Tests that setting a value sweeps once the interval has passed."""
+
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    files = FileCache(tmp_path, sweep_interval=0)
+    files.set("expiring", 1, ttl=10)
+    clock.advance(20)
+    files.set("other", 2)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert files.get("other") == 2
@@ -0,0 +1,92 @@
+"""Tests of the pooling of database connections."""
+
+from configparser import ConfigParser
+from threading import Thread
+from typing import Iterator
+
+from peewee import DatabaseProxy
+from playhouse.pool import PooledSqliteDatabase
+from pytest import fixture, mark
+
+from immosearch import pool
+from immosearch.orm import Heartbeat
+from immosearch.pool import install, release, stats
+from immosearch.synthetic import sqlite_database
+
+
+@fixture(name="config")
+def fixture_config(monkeypatch) -> ConfigParser:
+    """Configures pooling and resets the pools."""
+
+    config = ConfigParser()
+    config.read_dict({"pool": {"max_connections": "2"}})
+    monkeypatch.setattr(pool, "get_config", lambda: config)
+    monkeypatch.setattr(pool, "POOLS", [])
+    return config
+
+
+@fixture(name="proxy")
+def fixture_proxy(tmp_path) -> Iterator[DatabaseProxy]:
+    """Returns a proxy of a file-based SQLite database."""
+
+    with sqlite_database([Heartbeat], tmp_path / "immosearch.db") as database:
+        proxy = DatabaseProxy()
+        proxy.initialize(database)
+        yield proxy
+
+        if isinstance(proxy.obj, PooledSqliteDatabase):
+            proxy.obj.close_all()
+
+
+@mark.usefixtures("config")
+def test_install_pools_proxies_once(proxy):
+    """Tests that each proxy is initialized with one pool."""
+
+    pools = install([proxy, proxy, DatabaseProxy()])
+    assert pools == [proxy.obj]
+    assert isinstance(proxy.obj, PooledSqliteDatabase)
+    assert proxy.obj._max_connections == 2  # pylint: disable=W0212
+    assert install([proxy]) == pools
+
+
+def test_install_without_config(monkeypatch, proxy):
+    """Tests that the proxies are left alone if pooling is not configured."""
+
+    monkeypatch.setattr(pool, "get_config", ConfigParser)
+    monkeypatch.setattr(pool, "POOLS", [])
+    database = proxy.obj
+    assert install([proxy]) == []
+    assert proxy.obj is database
+
+
+@mark.usefixtures("config")
+def test_release_returns_connections(proxy):
+    """Tests that release() returns the thread's connection to its pool."""
+
+    (database,) = install([proxy])
+    name = database.database
+    database.connect()
+    database.execute_sql("SELECT 1")
+    assert stats() == {name: (1, 0, 2)}
+    release()
+    assert stats() == {name: (0, 1, 2)}
+    release()  # Releasing without a connection is a no-op.
+    assert stats() == {name: (0, 1, 2)}
+    database.connect()
+    assert stats() == {name: (1, 0, 2)}  # The idle connection is reused.
+    release()
+
+
+@mark.usefixtures("config")
+def test_release_keeps_connections_of_other_threads(proxy):
+    """Tests that release() only returns the current thread's connection."""
+
+    (database,) = install([proxy])
+    name = database.database
+    thread = Thread(target=database.connect)
+    thread.start()
+    thread.join()
+    database.connect()
+    assert stats() == {name: (2, 0, 2)}
+    release()
+    assert stats() == {name: (1, 1, 2)}
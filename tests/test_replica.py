@@ -0,0 +1,123 @@
+"""Tests of the routing of read-only requests to read replicas."""
+
+from contextvars import copy_context
+from datetime import datetime, timedelta
+from threading import Thread
+from typing import Iterator
+
+from peewee import Database
+from pytest import fixture
+
+from immosearch.orm import Heartbeat
+from immosearch.replica import HEARTBEAT, READ_ONLY, Lag, Router, read_only
+from immosearch.synthetic import sqlite_database
+
+
+@fixture(name="primary")
+def fixture_primary(tmp_path) -> Iterator[Database]:
+    """Returns the primary database."""
+
+    with sqlite_database([Heartbeat], tmp_path / "primary.db") as database:
+        yield database
+
+
+@fixture(name="replica")
+def fixture_replica(tmp_path) -> Iterator[Database]:
+    """Returns the replica database."""
+
+    with sqlite_database([Heartbeat], tmp_path / "replica.db") as database:
+        yield database
+
+
+def replicate_heartbeat(replica: Database, age: float):
+    """Writes a heartbeat of the given age in seconds to the replica."""
+
+    Heartbeat.replace(
+        id=HEARTBEAT, timestamp=datetime.now() - timedelta(seconds=age)
+    ).bind(replica).execute()
+
+
+def test_routes_read_only_contexts_to_replica(primary, replica):
+    """Tests that only read-only contexts are routed to the replica."""
+
+    replicate_heartbeat(replica, 0)
+    router = Router(primary, replica, Lag(replica, max_lag=30, interval=0))
+    assert not READ_ONLY.get()
+    assert router.current is primary
+
+    with read_only():
+        assert router.current is replica
+        assert router.database == replica.database
+
+    assert router.current is primary
+
+
+def test_falls_back_to_primary_when_lagging(primary, replica):
+    """Tests that a lagging replica is not used."""
+
+    replicate_heartbeat(replica, 60)
+    router = Router(primary, replica, Lag(replica, max_lag=30, interval=0))
+
+    with read_only():
+        assert router.current is primary
+
+
+def test_falls_back_to_primary_without_heartbeat(primary, replica):
+    """Tests that a replica without heartbeat is not used."""
+
+    router = Router(primary, replica, Lag(replica, max_lag=30, interval=0))
+
+    with read_only():
+        assert router.current is primary
+
+
+def test_measures_lag_once_per_interval(primary, replica):
+    """Tests that the lag is not measured again within the interval."""
+
+    replicate_heartbeat(replica, 0)
+    router = Router(primary, replica, Lag(replica, max_lag=30, interval=3600))
+
+    with read_only():
+        assert router.current is replica
+        replicate_heartbeat(replica, 60)
+        assert router.current is replica
+
+    router.lag.interval = 0
+
+    with read_only():
+        assert router.current is primary
+
+
+def test_read_only_is_local_to_context(primary, replica):
+    """Tests that read-only contexts do not leak into other threads."""
+
+    replicate_heartbeat(replica, 0)
+    router = Router(primary, replica, Lag(replica, max_lag=30, interval=0))
+    current = []
+
+    with read_only():
+        thread = Thread(target=lambda: current.append(router.current))
+        thread.start()
+        thread.join()
+        current.append(copy_context().run(lambda: router.current))
+
+    assert current == [primary, replica]
+
+
+def test_exits_entered_database(primary, replica):
+    """Tests that the database entered is exited, even if the
+    read-only state changed in between.
+    """
+
+    replicate_heartbeat(replica, 0)
+    router = Router(primary, replica, Lag(replica, max_lag=30, interval=0))
+    primary.close()
+    replica.close()
+
+    with read_only():
+        router.__enter__()
+
+    assert not replica.is_closed()
+    assert primary.is_closed()
+    router.__exit__(None, None, None)
+    assert replica.is_closed()